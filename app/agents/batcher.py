@@ -0,0 +1,137 @@
+"""
+Micro-batching dispatcher for LLM calls.
+Coalesces concurrent requests into a single batched provider call.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingRequest:
+    """A queued LLM request waiting for its batch to be dispatched."""
+    messages: Sequence[BaseMessage]
+    future: asyncio.Future
+    config: Optional[RunnableConfig] = None
+
+
+class LLMBatcher:
+    """
+    Collects LLM requests for a short window and dispatches them together.
+
+    Requests are binned by a key (the user type) so that requests with
+    similar expected response lengths share a batch; a slow bin never holds
+    up a fast one. The first request to arrive opens a batching window of
+    ``window_ms``; when it closes, every bin is drained round-robin into
+    batches of at most ``max_batch`` and each batch is sent as its own
+    ``llm.abatch`` call, with each request's own ``RunnableConfig`` so
+    callbacks and run metadata are kept. Each caller awaits its own future.
+    """
+
+    def __init__(self, llm, window_ms: float = 5.0, max_batch: int = 16):
+        self.llm = llm
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self._pending = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    def start(self) -> asyncio.Task:
+        """Start the background dispatch loop on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done():
+            if self._task.get_loop() is loop:
+                return self._task
+            # The previous loop is gone; its queues cannot be awaited from here.
+            self.queues = {}
+            self._pending = asyncio.Event()
+        self._task = loop.create_task(self.run())
+        return self._task
+
+    async def submit(
+        self,
+        messages: Sequence[BaseMessage],
+        bin_key: str = "default",
+        config: Optional[RunnableConfig] = None,
+    ) -> BaseMessage:
+        """Queue messages in ``bin_key``'s next batch and wait for the LLM response."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        queue = self.queues.get(bin_key)
+        if queue is None:
+            queue = self.queues[bin_key] = asyncio.Queue()
+        queue.put_nowait(PendingRequest(messages=messages, future=future, config=config))
+        self._pending.set()
+        return await future
+
+    async def run(self):
+        """Drain the bins into batches until cancelled."""
+        while True:
+            await self._pending.wait()
+            await asyncio.sleep(self.window_ms / 1000)
+            self._pending.clear()
+
+            while any(not queue.empty() for queue in self.queues.values()):
+                for queue in list(self.queues.values()):
+                    batch = []
+                    while len(batch) < self.max_batch and not queue.empty():
+                        item = queue.get_nowait()
+                        if not item.future.done():
+                            batch.append(item)
+                    if batch:
+                        task = asyncio.create_task(self._dispatch(batch))
+                        self._inflight.add(task)
+                        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[PendingRequest]):
+        """Send one batch to the LLM and resolve each request's future."""
+        logger.debug(f"Dispatching LLM batch of {len(batch)} request(s)")
+
+        try:
+            responses = await self.llm.abatch(
+                [item.messages for item in batch],
+                [item.config for item in batch],
+                return_exceptions=True,
+            )
+        except asyncio.CancelledError:
+            # Closed mid-batch: release the callers instead of leaving them waiting
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            responses = [e] * len(batch)
+
+        for item, response in zip(batch, responses):
+            if item.future.done():
+                continue
+            if isinstance(response, BaseException):
+                item.future.set_exception(response)
+            else:
+                item.future.set_result(response)
+
+    async def close(self):
+        """Stop the dispatch loop and cancel any in-flight batches."""
+        tasks = list(self._inflight)
+        if self._task is not None:
+            tasks.append(self._task)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for queue in self.queues.values():
+            while not queue.empty():
+                item = queue.get_nowait()
+                if not item.future.done():
+                    item.future.cancel()
+
+        self._task = None
+        self._inflight.clear()
@@ -3,21 +3,29 @@ Simple chat agent using LangGraph with OpenAI integration.
 This is a minimal implementation to get started.
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, List, Optional, Any
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import MemorySaver
 
-from .states.chat_state import SessionInfo
+from .batcher import LLMBatcher
+from .states.chat_state import SessionInfo, SessionStore
 from .nodes.chat_nodes import ChatNodes
-from .graph.chat_graph import ChatGraphBuilder
+from .graph.chat_graph import CHECKPOINT_DURABILITY, ChatGraphBuilder
+from app.utils.checkpointer import close_checkpointer, create_checkpointer
 from app.utils.llm_provider import get_llm
 
 logger = logging.getLogger(__name__)
 
+# langchain-core messages have a fixed schema, so whether they carry a
+# timestamp is known at import time rather than per message.
+_HAS_TIMESTAMP = hasattr(HumanMessage, "timestamp") and hasattr(AIMessage, "timestamp")
+
 
 class ChatAgent:
     """
@@ -31,26 +39,83 @@ class ChatAgent:
         self.graph = None
         self.llm = None
         self.memory = MemorySaver()
-        self.sessions: Dict[str, SessionInfo] = {}
+        self.sessions: Dict[str, SessionInfo] = SessionStore()
         self.chat_nodes = None
         self.graph_builder = None
+        self.batcher = None
+        # One lock per session so concurrent turns don't overwrite each
+        # other's checkpoint. Weak values: a lock is dropped once no turn
+        # holds or waits on it, so this never outgrows the active sessions.
+        self._session_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+        
+    async def initialize(
+        self,
+        warmup: bool = False,
+        history_window: Optional[int] = None,
+        response_cache_size: int = 0,
+    ):
+        """
+        Initialize the chat agent.
         
-    async def initialize(self):
-        """Initialize the chat agent."""
+        Args:
+            warmup: Send a one-token request so the provider connection is
+                open before the first user request arrives
+            history_window: Send only the system prompt and this many of the
+                most recent messages to the LLM; the full history is still
+                checkpointed. ``None`` sends everything.
+            response_cache_size: Answer up to this many distinct prompts from
+                memory instead of calling the LLM again. ``0`` disables it.
+        """
         logger.info("Initializing chat agent...")
         
         self.llm = get_llm()
         
         if self.llm is None:
             logger.warning("No LLM configured. Running in mock mode.")
+        else:
+            self.batcher = LLMBatcher(self.llm)
+            self.batcher.start()
+            if warmup:
+                await self._warmup()
+
+        self.memory = await create_checkpointer(self.memory)
         
-        self.chat_nodes = ChatNodes(llm=self.llm, sessions=self.sessions)
+        self.chat_nodes = ChatNodes(
+            llm=self.llm,
+            sessions=self.sessions,
+            batcher=self.batcher,
+            history_window=history_window,
+            response_cache_size=response_cache_size,
+        )
         self.graph_builder = ChatGraphBuilder(self.chat_nodes)
         
         self.graph = self.graph_builder.build_graph(self.memory)
         
         logger.info("Chat agent initialized successfully")
-    
+
+    async def _warmup(self):
+        """Open the LLM provider connection with a minimal request."""
+        try:
+            await asyncio.wait_for(
+                self.llm.ainvoke([HumanMessage(content="hi")], max_tokens=1), timeout=5
+            )
+            logger.info("LLM connection warmed up")
+        except Exception as e:
+            logger.warning(f"LLM warm-up failed: {e}")
+
+    async def shutdown(self):
+        """Stop background tasks owned by the agent."""
+        if self.batcher is not None:
+            await self.batcher.close()
+        await close_checkpointer(self.memory)
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        """Get the lock that serializes turns for ``session_id``."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
+
     async def chat(self, message: str, session_id: str = "default", user_type: str = "customer") -> str:
         """
         Main chat interface.
@@ -63,46 +128,171 @@ class ChatAgent:
         Returns:
             AI response
         """
+        return await self._run_turn([HumanMessage(content=message)], session_id, user_type)
+    
+    async def chat_batch(
+        self, messages: List[str], session_id: str = "default", user_type: str = "customer"
+    ) -> str:
+        """
+        Send several user messages as a single turn.
+        
+        The messages are appended to the conversation together and answered
+        with one LLM call; each of them counts towards the session's
+        ``message_count``.
+        
+        Args:
+            messages: User messages, in order
+            session_id: Session identifier
+            user_type: User type for specialized responses
+            
+        Returns:
+            AI response to the whole batch
+        """
+        if not messages:
+            raise ValueError("chat_batch needs at least one message")
+        
+        return await self._run_turn(
+            [HumanMessage(content=message) for message in messages], session_id, user_type
+        )
+    
+    async def _run_turn(self, messages: List[BaseMessage], session_id: str, user_type: str) -> str:
+        """Run one graph turn for ``messages`` and return the AI reply."""
         try:
             initial_state = {
-                "messages": [HumanMessage(content=message)],
+                "messages": messages,
                 "session_id": session_id,
                 "user_type": user_type,
-                "processed": False
+                "processed": False,
+                "turn_message_count": len(messages)
             }
             
             thread_config = {"configurable": {"thread_id": session_id}}
             
-            result = await self.graph.ainvoke(initial_state, thread_config)
+            async with self._session_lock(session_id):
+                result = await self.graph.ainvoke(
+                    initial_state, thread_config, durability=CHECKPOINT_DURABILITY
+                )
             
-            ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
-            if ai_messages:
-                return ai_messages[-1].content
-            else:
-                return "I apologize, but I couldn't generate a response. Please try again."
+            for msg in reversed(result["messages"]):
+                if isinstance(msg, AIMessage):
+                    return msg.content
+            
+            return "I apologize, but I couldn't generate a response. Please try again."
                 
         except Exception as e:
             logger.error(f"Chat processing error: {e}", exc_info=True)
             return "I apologize, but I'm experiencing technical difficulties. Please try again."
     
+    async def chat_stream(
+        self, message: str, session_id: str = "default", user_type: str = "customer"
+    ) -> AsyncIterator[str]:
+        """
+        Streaming chat interface.
+        
+        Args:
+            message: User message
+            session_id: Session identifier
+            user_type: User type for specialized responses
+            
+        Yields:
+            Chunks of the AI response as the LLM produces them
+        """
+        try:
+            initial_state = {
+                "messages": [HumanMessage(content=message)],
+                "session_id": session_id,
+                "user_type": user_type,
+                "processed": False,
+                "turn_message_count": 1
+            }
+            
+            thread_config = {"configurable": {"thread_id": session_id, "stream": True}}
+            
+            async with self._session_lock(session_id):
+                async for chunk, metadata in self.graph.astream(
+                    initial_state,
+                    thread_config,
+                    stream_mode="messages",
+                    durability=CHECKPOINT_DURABILITY,
+                ):
+                    if metadata.get("langgraph_node") != "llm_processing":
+                        continue
+                    if isinstance(chunk, AIMessage) and chunk.content:
+                        yield chunk.content
+                    
+        except Exception as e:
+            logger.error(f"Chat streaming error: {e}", exc_info=True)
+            yield "I apologize, but I'm experiencing technical difficulties. Please try again."
+    
+    async def chat_many(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrent_requests: int = 32
+    ) -> List[str]:
+        """
+        Run several chat turns concurrently.
+        
+        Turns for different sessions run in parallel, bounded by
+        ``max_concurrent_requests``. Turns that share a session run in order
+        so each one sees the previous reply in its history.
+        
+        Args:
+            requests: Dicts with ``message`` and optional ``session_id``/``user_type``
+            max_concurrent_requests: Maximum number of graph runs in flight
+            
+        Returns:
+            AI responses in the same order as ``requests``
+        """
+        semaphore = asyncio.Semaphore(max_concurrent_requests)
+        responses: List[str] = [""] * len(requests)
+        
+        by_session: Dict[str, List[int]] = {}
+        for index, request in enumerate(requests):
+            by_session.setdefault(request.get("session_id", "default"), []).append(index)
+        
+        async def run_session(session_id: str, indexes: List[int]):
+            for index in indexes:
+                request = requests[index]
+                async with semaphore:
+                    responses[index] = await self.chat(
+                        message=request["message"],
+                        session_id=session_id,
+                        user_type=request.get("user_type", "customer")
+                    )
+        
+        await asyncio.gather(*[
+            run_session(session_id, indexes) for session_id, indexes in by_session.items()
+        ])
+        
+        return responses
+    
     async def session_exists(self, session_id: str) -> bool:
         """Check if a session exists."""
         return session_id in self.sessions
     
+    async def _checkpoint_messages(self, session_id: str) -> List[BaseMessage]:
+        """Read a session's messages from its latest checkpoint."""
+        thread_config = {"configurable": {"thread_id": session_id}}
+        
+        # Read the latest checkpoint directly; aget_state would rebuild the
+        # full graph snapshot (next nodes, tasks) just to reach the messages.
+        checkpoint_tuple = await self.memory.aget_tuple(thread_config)
+        channel_values = checkpoint_tuple.checkpoint.get("channel_values", {}) if checkpoint_tuple else {}
+        return channel_values.get("messages", [])
+    
     async def get_conversation_history(self, session_id: str) -> List[Dict[str, Any]]:
         """Get conversation history for a session."""
         try:
-            thread_config = {"configurable": {"thread_id": session_id}}
             history = []
             
-            current_state = await self.graph.aget_state(thread_config)
-            if current_state and current_state.values.get("messages"):
-                for msg in current_state.values["messages"]:
+            messages = await self._checkpoint_messages(session_id)
+            if messages:
+                for msg in messages:
                     if isinstance(msg, (HumanMessage, AIMessage)):
                         history.append({
                             "type": "human" if isinstance(msg, HumanMessage) else "ai",
                             "content": msg.content,
-                            "timestamp": getattr(msg, 'timestamp', None)
+                            "timestamp": msg.timestamp if _HAS_TIMESTAMP else None
                         })
             
             return history
@@ -111,6 +301,16 @@ class ChatAgent:
             logger.error(f"Error getting conversation history: {e}")
             return []
     
+    async def get_conversation_history_humans(self, session_id: str) -> List[str]:
+        """Get the content of the user's messages in a session, in order."""
+        try:
+            messages = await self._checkpoint_messages(session_id)
+            return [msg.content for msg in messages if isinstance(msg, HumanMessage)]
+            
+        except Exception as e:
+            logger.error(f"Error getting conversation history: {e}")
+            return []
+    
     async def clear_session(self, session_id: str):
         """Clear a conversation session."""
         try:
@@ -124,4 +324,9 @@ class ChatAgent:
     
     async def get_session_info(self, session_id: str) -> Optional[SessionInfo]:
         """Get session information."""
-        return self.sessions.get(session_id) 
\ No newline at end of file
+        return self.sessions.get(session_id)
+    
+    def _bulk_create_sessions(self, session_ids: Iterable[str], user_type: str = "customer"):
+        """Register sessions directly, without running the graph for each one."""
+        for session_id in session_ids:
+            self.sessions[session_id] = SessionInfo(session_id=session_id, user_type=user_type) 
\ No newline at end of file
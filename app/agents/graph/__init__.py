@@ -2,6 +2,6 @@
 Chat agent graph package.
 """
 
-from .chat_graph import ChatGraphBuilder
+from .chat_graph import CHECKPOINT_DURABILITY, ChatGraphBuilder
 
-__all__ = ["ChatGraphBuilder"] 
\ No newline at end of file
+__all__ = ["CHECKPOINT_DURABILITY", "ChatGraphBuilder"] 
\ No newline at end of file
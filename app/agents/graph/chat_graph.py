@@ -12,6 +12,11 @@ from ..nodes.chat_nodes import ChatNodes
 
 logger = logging.getLogger(__name__)
 
+# Persist state once when a run finishes instead of after every super-step.
+# Intermediate checkpoints are never resumed from, so writing them only
+# copies the growing message list for nothing.
+CHECKPOINT_DURABILITY = "exit"
+
 
 class ChatGraphBuilder:
     """Builder for the chat agent's LangGraph workflow."""
@@ -20,7 +25,12 @@ class ChatGraphBuilder:
         self.chat_nodes = chat_nodes
     
     def build_graph(self, memory: MemorySaver):
-        """Build the LangGraph state graph."""
+        """
+        Build the LangGraph state graph.
+        
+        Invoke the compiled graph with ``durability=CHECKPOINT_DURABILITY`` so
+        ``memory`` is written once per run.
+        """
         logger.info("Building chat agent graph...")
         
         workflow = StateGraph(ChatState)
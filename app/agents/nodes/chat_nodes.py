@@ -3,13 +3,17 @@ Chat agent node functions for LangGraph processing.
 """
 
 import logging
-from typing import Dict
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
 
-from langchain_core.messages import BaseMessage, SystemMessage, AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, RemoveMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 
+from ..batcher import LLMBatcher
 from ..states.chat_state import ChatState, SessionInfo
-from ..utils.chat_utils import get_system_prompt
+from ..utils.chat_utils import SYSTEM_PROMPTS, get_system_message
 
 logger = logging.getLogger(__name__)
 
@@ -17,64 +21,129 @@ logger = logging.getLogger(__name__)
 class ChatNodes:
     """Container class for chat processing nodes."""
     
-    def __init__(self, llm: ChatOpenAI = None, sessions: Dict[str, SessionInfo] = None):
+    def __init__(
+        self,
+        llm: ChatOpenAI = None,
+        sessions: Dict[str, SessionInfo] = None,
+        batcher: LLMBatcher = None,
+        history_window: Optional[int] = None,
+        response_cache_size: int = 0,
+    ):
         self.llm = llm
         self.sessions = sessions if sessions is not None else {}
+        self.batcher = batcher
+        self.history_window = history_window
+        # Identical prompts are answered from here without calling the LLM.
+        # Disabled (size 0) unless repeated prompts are expected.
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[Tuple, AIMessage] = OrderedDict()
     
-    async def input_processing_node(self, state: ChatState) -> ChatState:
+    def _context_window(self, messages: Sequence[BaseMessage]) -> Sequence[BaseMessage]:
+        """Return the system prompt plus the last ``history_window`` messages."""
+        window = self.history_window
+        if not window:
+            return messages
+        
+        if messages and isinstance(messages[0], SystemMessage):
+            if len(messages) - 1 <= window:
+                return messages
+            return [messages[0], *messages[-window:]]
+        
+        return messages[-window:]
+    
+    def _cached_response(self, key: Tuple) -> Optional[AIMessage]:
+        """Return a fresh copy of the cached response for ``key``, if any."""
+        cached = self._response_cache.get(key)
+        if cached is None:
+            return None
+        self._response_cache.move_to_end(key)
+        # Cleared id, so add_messages appends it as a new message each time
+        return cached.model_copy(update={"id": None})
+    
+    def _cache_response(self, key: Tuple, response: AIMessage):
+        """Remember ``response`` for ``key``, evicting the least recently used entry."""
+        self._response_cache[key] = response
+        if len(self._response_cache) > self.response_cache_size:
+            self._response_cache.popitem(last=False)
+    
+    async def input_processing_node(self, state: ChatState) -> Dict[str, Any]:
         """Node for processing user input and preparing context."""
         logger.info(f"Processing input for session: {state['session_id']}")
         
-        system_prompt = get_system_prompt(state["user_type"])
+        # The system prompt is only ever placed at index 0, so there is no
+        # need to scan the whole history for it.
+        messages = state["messages"]
+        has_system_message = bool(messages) and isinstance(messages[0], SystemMessage)
         
-        has_system_message = any(isinstance(msg, SystemMessage) for msg in state["messages"])
+        if has_system_message:
+            return {}
         
-        if not has_system_message:
-            messages = [SystemMessage(content=system_prompt)] + list(state["messages"])
-            state["messages"] = messages
-        
-        return state
+        # add_messages only appends, so the system prompt is put in front by
+        # replacing the history. This happens once, on a session's first turn.
+        return {
+            "messages": [
+                RemoveMessage(id=REMOVE_ALL_MESSAGES),
+                get_system_message(state["user_type"]),
+                *messages,
+            ]
+        }
     
-    async def llm_processing_node(self, state: ChatState) -> ChatState:
+    async def llm_processing_node(
+        self, state: ChatState, config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
         """Node for LLM processing - this connects to OpenAI."""
         logger.info(f"LLM processing for session: {state['session_id']}")
         
+        # Batched calls only resolve once the whole completion is ready, so
+        # streaming runs call the LLM directly to surface tokens as they arrive.
+        streaming = bool(config and config.get("configurable", {}).get("stream"))
+        messages = self._context_window(state["messages"])
+        
+        cache_key = None
+        if self.response_cache_size and self.llm is not None:
+            cache_key = (state["user_type"], *((msg.type, str(msg.content)) for msg in messages))
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return {"messages": [cached]}
+        
         try:
             if self.llm is None:
                 response_content = f"Hello! I'm a mock chatbot response to your message. (User type: {state['user_type']}) Your message was processed successfully, but I'm running without OpenAI API key. Please configure OPENAI_API_KEY environment variable for real AI responses."
                 response = AIMessage(content=response_content)
+            elif self.batcher is not None and not streaming:
+                # Bin by known user type only; a queue per client-supplied
+                # string would grow without bound.
+                user_type = state["user_type"]
+                bin_key = user_type if user_type in SYSTEM_PROMPTS else "customer"
+                response = await self.batcher.submit(messages, bin_key, config)
             else:
-                response = await self.llm.ainvoke(state["messages"])
+                response = await self.llm.ainvoke(messages, config)
             
-            messages = list(state["messages"])
-            messages.append(response)
-            state["messages"] = messages
+            if cache_key is not None:
+                self._cache_response(cache_key, response)
             
         except Exception as e:
             logger.error(f"LLM processing error: {e}")
-            error_message = AIMessage(
+            response = AIMessage(
                 content="I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
             )
-            messages = list(state["messages"])
-            messages.append(error_message)
-            state["messages"] = messages
         
-        return state
+        return {"messages": [response]}
     
-    async def response_formatting_node(self, state: ChatState) -> ChatState:
+    async def response_formatting_node(self, state: ChatState) -> Dict[str, Any]:
         """Node for formatting the final response."""
         logger.info(f"Formatting response for session: {state['session_id']}")
         
-        state["processed"] = True
-        
         session_id = state["session_id"]
-        if session_id in self.sessions:
-            self.sessions[session_id].message_count += 1
+        added = state.get("turn_message_count", 1)
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.message_count += added
         else:
             self.sessions[session_id] = SessionInfo(
                 session_id=session_id,
-                message_count=1,
+                message_count=added,
                 user_type=state["user_type"]
             )
         
-        return state 
\ No newline at end of file
+        return {"processed": True}
@@ -2,6 +2,6 @@
 Chat agent states package.
 """
 
-from .chat_state import ChatState, SessionInfo
+from .chat_state import ChatState, SessionInfo, SessionStore
 
-__all__ = ["ChatState", "SessionInfo"] 
\ No newline at end of file
+__all__ = ["ChatState", "SessionInfo", "SessionStore"]
\ No newline at end of file
@@ -2,12 +2,15 @@
 Chat agent state definitions.
 """
 
-from typing import Sequence, TypedDict, Annotated
+from collections import OrderedDict
+from typing import NotRequired, Sequence, TypedDict, Annotated
 from dataclasses import dataclass
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
+MAX_SESSIONS = 10_000
+
 
 class ChatState(TypedDict):
     """State for the simple chat agent."""
@@ -15,11 +18,43 @@ class ChatState(TypedDict):
     session_id: str
     user_type: str
     processed: bool
+    # User messages added by this turn; counted into SessionInfo.message_count
+    turn_message_count: NotRequired[int]
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionInfo:
     """Simple session information tracking."""
     session_id: str
     message_count: int = 0
-    user_type: str = "customer" 
\ No newline at end of file
+    user_type: str = "customer"
+
+
+class SessionStore(OrderedDict):
+    """
+    Session registry bounded to ``max_sessions`` entries.
+    
+    Reading or writing a session marks it as most recently used; once the
+    store is full, the least recently used session is evicted.
+    """
+    
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        super().__init__()
+        self.max_sessions = max_sessions
+    
+    def __getitem__(self, session_id: str) -> SessionInfo:
+        value = super().__getitem__(session_id)
+        self.move_to_end(session_id)
+        return value
+    
+    def get(self, session_id: str, default=None):
+        value = super().get(session_id, default)
+        if value is not default:
+            self.move_to_end(session_id)
+        return value
+    
+    def __setitem__(self, session_id: str, value: SessionInfo):
+        super().__setitem__(session_id, value)
+        self.move_to_end(session_id)
+        if len(self) > self.max_sessions:
+            self.popitem(last=False)
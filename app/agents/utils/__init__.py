@@ -2,6 +2,6 @@
 Chat agent utils package.
 """
 
-from .chat_utils import get_system_prompt
+from .chat_utils import get_system_message, get_system_prompt
 
-__all__ = ["get_system_prompt"] 
\ No newline at end of file
+__all__ = ["get_system_message", "get_system_prompt"] 
\ No newline at end of file
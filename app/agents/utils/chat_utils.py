@@ -4,14 +4,29 @@ Chat agent utility functions.
 
 import logging
 
+from langchain_core.messages import SystemMessage
+
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPTS = {
+    "customer": "You are a helpful AI assistant for customers. Be friendly, clear, and helpful in solving their needs.",
+    "support_agent": "You are an AI assistant for support agents. Provide detailed, accurate information to help resolve customer issues.",
+    "manager": "You are an AI assistant for managers. Provide strategic insights and data-driven recommendations."
+}
+
+# Built once so each turn reuses a validated message. The fixed ids stop
+# add_messages from assigning (and so mutating) ids on these shared objects.
+SYSTEM_MESSAGES = {
+    user_type: SystemMessage(content=prompt, id=f"system-{user_type}")
+    for user_type, prompt in SYSTEM_PROMPTS.items()
+}
+
 
 def get_system_prompt(user_type: str) -> str:
     """Get system prompt based on user type."""
-    prompts = {
-        "customer": "You are a helpful AI assistant for customers. Be friendly, clear, and helpful in solving their needs.",
-        "support_agent": "You are an AI assistant for support agents. Provide detailed, accurate information to help resolve customer issues.",
-        "manager": "You are an AI assistant for managers. Provide strategic insights and data-driven recommendations."
-    }
-    return prompts.get(user_type, prompts["customer"]) 
\ No newline at end of file
+    return SYSTEM_PROMPTS.get(user_type, SYSTEM_PROMPTS["customer"])
+
+
+def get_system_message(user_type: str) -> SystemMessage:
+    """Get the prebuilt system message for a user type."""
+    return SYSTEM_MESSAGES.get(user_type, SYSTEM_MESSAGES["customer"])
@@ -3,19 +3,60 @@ Minimal FastAPI application for the chatbot boilerplate.
 Starting with a simple health check endpoint.
 """
 
+import asyncio
 import time
 import logging
 import os
-from fastapi import FastAPI
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from app.agents.chat_agent import ChatAgent
 from app.routers import chat_routes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    """Read an integer environment variable, falling back to ``default`` if it is invalid."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r} is not an integer; using {default}")
+        return default
+    if number < minimum:
+        logger.warning(f"{name}={number} is below {minimum}; using {default}")
+        return default
+    return number
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared chat agent on startup and release it on shutdown."""
+    # Sync dependencies and blocking helpers run in the default executor;
+    # its stock size of min(32, cpu_count + 4) is too small for I/O-bound load.
+    executor = ThreadPoolExecutor(max_workers=_env_int("THREAD_POOL_SIZE", 128, minimum=1))
+    asyncio.get_running_loop().set_default_executor(executor)
+    
+    app.state.chat_agent = ChatAgent()
+    await app.state.chat_agent.initialize(
+        warmup=os.getenv("LLM_WARMUP", "false").lower() == "true",
+        history_window=_env_int("CHAT_HISTORY_WINDOW", 0) or None,
+        response_cache_size=_env_int("LLM_RESPONSE_CACHE_SIZE", 0),
+    )
+    
+    yield
+    
+    await app.state.chat_agent.shutdown()
+    executor.shutdown(wait=False)
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     
@@ -25,6 +66,7 @@ def create_app() -> FastAPI:
         description="A comprehensive chatbot boilerplate with LangGraph and multi-user support",
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
     
     # Add CORS middleware
@@ -39,6 +81,12 @@ def create_app() -> FastAPI:
     # Include routers
     app.include_router(chat_routes.router, prefix="/api/v1")
     
+    @app.exception_handler(Exception)
+    async def unhandled_exception_handler(request: Request, exc: Exception):
+        """Return a generic error for exceptions the routes don't handle."""
+        logger.error(f"Unhandled error on {request.url.path}: {exc}", exc_info=exc)
+        return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+    
     return app
 
 # Create the app instance
@@ -118,4 +166,7 @@ if __name__ == "__main__":
         port=8000,
         reload=True,
         log_level="info",
+        # uvloop has no Windows build; uvicorn[standard] skips it there.
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
     )
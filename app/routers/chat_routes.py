@@ -5,8 +5,10 @@ Handles chat interactions with session management.
 
 import logging
 import uuid
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional, Dict, Any, List
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.agents.chat_agent import ChatAgent
@@ -27,15 +29,9 @@ class ChatResponse(BaseModel):
     is_new_session: bool = Field(..., description="Whether this was a new session")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
 
-chat_agent = None
-
-async def get_chat_agent() -> ChatAgent:
-    """Get the chat agent instance."""
-    global chat_agent
-    if chat_agent is None:
-        chat_agent = ChatAgent()
-        await chat_agent.initialize()
-    return chat_agent
+async def get_chat_agent(request: Request) -> ChatAgent:
+    """Get the chat agent created by the application lifespan."""
+    return request.app.state.chat_agent
 
 @router.post("/", response_model=ChatResponse)
 async def chat(
@@ -49,23 +45,103 @@ async def chat(
     - If session_id is provided and exists: continues the conversation
     - If session_id is not provided or doesn't exist: starts a new session
     """
-    try:
-        if not request.session_id:
-            session_id = str(uuid.uuid4())
-            is_new_session = True
-        else:
-            session_id = request.session_id
-            is_new_session = not await agent.session_exists(session_id)
-        
-        logger.info(f"Chat request - Session: {session_id}, New: {is_new_session}, Message: {request.message[:50]}...")
-        
-        response = await agent.chat(
+    if not request.session_id:
+        session_id = str(uuid.uuid4())
+        is_new_session = True
+    else:
+        session_id = request.session_id
+        is_new_session = not await agent.session_exists(session_id)
+    
+    logger.info(f"Chat request - Session: {session_id}, New: {is_new_session}, Message: {request.message[:50]}...")
+    
+    response = await agent.chat(
+        message=request.message,
+        session_id=session_id,
+        user_type=request.user_type
+    )
+    
+    return ChatResponse(
+        response=response,
+        session_id=session_id,
+        user_type=request.user_type,
+        is_new_session=is_new_session,
+        metadata={
+            "message_length": len(request.message),
+            "response_length": len(response),
+            "processing_time": "calculated_later"
+        }
+    )
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    agent: ChatAgent = Depends(get_chat_agent)
+):
+    """
+    Streaming chat endpoint.
+    
+    Sends the response as Server-Sent Events while the LLM generates it.
+    Each event's data is a JSON-encoded text chunk. The session ID is
+    returned in the ``X-Session-ID`` header.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    
+    logger.info(f"Chat stream request - Session: {session_id}, Message: {request.message[:50]}...")
+    
+    async def event_stream():
+        async for chunk in agent.chat_stream(
             message=request.message,
             session_id=session_id,
             user_type=request.user_type
-        )
-        
-        return ChatResponse(
+        ):
+            yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Session-ID": session_id}
+    )
+
+@router.post("/batch", response_model=List[ChatResponse])
+async def chat_batch(
+    requests: List[ChatRequest],
+    agent: ChatAgent = Depends(get_chat_agent)
+):
+    """
+    Batch chat endpoint.
+    
+    Processes several chat requests concurrently. Requests without a
+    session_id each start a new session.
+    """
+    session_ids = []
+    new_sessions = []
+    # A session only counts as new for its first request in the batch
+    seen = set()
+    for request in requests:
+        if not request.session_id:
+            session_ids.append(str(uuid.uuid4()))
+            new_sessions.append(True)
+        else:
+            session_ids.append(request.session_id)
+            new_sessions.append(
+                request.session_id not in seen
+                and not await agent.session_exists(request.session_id)
+            )
+            seen.add(request.session_id)
+    
+    logger.info(f"Batch chat request - {len(requests)} message(s)")
+    
+    responses = await agent.chat_many([
+        {
+            "message": request.message,
+            "session_id": session_id,
+            "user_type": request.user_type
+        }
+        for request, session_id in zip(requests, session_ids)
+    ])
+    
+    return [
+        ChatResponse(
             response=response,
             session_id=session_id,
             user_type=request.user_type,
@@ -76,10 +152,9 @@ async def chat(
                 "processing_time": "calculated_later"
             }
         )
-        
-    except Exception as e:
-        logger.error(f"Error in chat endpoint: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+        for request, session_id, is_new_session, response
+        in zip(requests, session_ids, new_sessions, responses)
+    ]
 
 @router.get("/sessions/{session_id}/history")
 async def get_chat_history(
@@ -112,7 +187,7 @@ async def clear_session(
         raise HTTPException(status_code=500, detail="Failed to clear session")
 
 @router.get("/health")
-async def chat_health():
+async def chat_health(request: Request):
     """Health check for chat service."""
     from app.utils.llm_provider import get_available_providers, validate_provider_config
     import os
@@ -124,7 +199,7 @@ async def chat_health():
     return {
         "status": "healthy",
         "service": "chat",
-        "agent_initialized": chat_agent is not None,
+        "agent_initialized": getattr(request.app.state, "chat_agent", None) is not None,
         "llm_config": {
             "current_provider": current_provider,
             "available_providers": available_providers,
@@ -133,6 +208,8 @@ async def chat_health():
         },
         "endpoints": {
             "chat": "/chat/",
+            "stream": "/chat/stream",
+            "batch": "/chat/batch",
             "history": "/chat/sessions/{session_id}/history",
             "clear": "/chat/sessions/{session_id}"
         }
@@ -0,0 +1,43 @@
+"""
+Conversation checkpointer utilities.
+Uses Redis when configured so sessions can be shared across workers.
+"""
+
+import logging
+import os
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+try:
+    from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+except ImportError:
+    AsyncRedisSaver = None
+
+logger = logging.getLogger(__name__)
+
+
+async def create_checkpointer(fallback: BaseCheckpointSaver) -> BaseCheckpointSaver:
+    """
+    Get the checkpointer based on environment configuration.
+
+    Returns an ``AsyncRedisSaver`` when ``REDIS_URL`` is set, otherwise
+    ``fallback`` (the in-process ``MemorySaver``).
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return fallback
+
+    if AsyncRedisSaver is None:
+        logger.error("langgraph-checkpoint-redis not installed. Run: pip install langgraph-checkpoint-redis")
+        return fallback
+
+    logger.info("Using Redis checkpointer")
+    checkpointer = AsyncRedisSaver(redis_url=redis_url)
+    await checkpointer.asetup()
+    return checkpointer
+
+
+async def close_checkpointer(checkpointer: BaseCheckpointSaver):
+    """Release connections held by a checkpointer from ``create_checkpointer``."""
+    if AsyncRedisSaver is not None and isinstance(checkpointer, AsyncRedisSaver):
+        await checkpointer.__aexit__(None, None, None)
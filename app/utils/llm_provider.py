@@ -5,6 +5,7 @@ Supports multiple LLM providers with dynamic loading.
 
 import logging
 import os
+from functools import cache
 
 from langchain_openai import ChatOpenAI
 
@@ -31,8 +32,14 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+@cache
 def get_llm():
-    """Get the LLM based on environment configuration."""
+    """
+    Get the LLM based on environment configuration.
+    
+    The result is cached for the life of the process; call
+    ``get_llm.cache_clear()`` after changing provider environment variables.
+    """
     
     llm_provider = os.getenv("LLM_PROVIDER", "openai").lower()
     logger.info(f"Using LLM provider: {llm_provider}")
@@ -90,8 +97,9 @@ def get_llm():
         return ChatOpenAI(model="gpt-4o-mini", temperature=0.7, max_tokens=1000, api_key=api_key)
 
 
-def get_available_providers():
-    """Get list of available LLM providers based on installed packages."""
+@cache
+def get_available_providers() -> tuple:
+    """Get the available LLM providers based on installed packages, as a tuple."""
     providers = ["openai"]  # Always available
     
     if ChatAnthropic is not None:
@@ -103,12 +111,18 @@ def get_available_providers():
     if ChatOllama is not None:
         providers.append("ollama")
         
-    return providers
+    return tuple(providers)
 
 
 def validate_provider_config(provider: str) -> dict:
     """Validate that required configuration exists for a provider."""
-    provider = provider.lower()
+    # A fresh dict per call; the cached status is shared by every caller
+    return dict(_provider_config_status(provider.lower()))
+
+
+@cache
+def _provider_config_status(provider: str) -> dict:
+    """Work out a provider's configuration status; cached per provider."""
     status = {"provider": provider, "configured": False, "missing": []}
     
     if provider == "openai":
@@ -148,4 +162,5 @@ def validate_provider_config(provider: str) -> dict:
         if not status["missing"]:
             status["configured"] = True
     
+    status["missing"] = tuple(status["missing"])
     return status
\ No newline at end of file
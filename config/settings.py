@@ -3,98 +3,114 @@ Configuration management for the chatbot boilerplate.
 Uses Pydantic Settings for environment variable handling and validation.
 """
 
+import json
 import os
-from typing import List, Optional, Dict, Any
+from functools import cache, cached_property, lru_cache
+from types import MappingProxyType, SimpleNamespace
+from typing import Dict, List, Literal, Mapping, Optional, Any, get_origin
 from pathlib import Path
 
-from pydantic import Field, validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from dotenv import dotenv_values
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, InitSettingsSource, SettingsConfigDict, SettingsError
 
+ENV_FILE = ".env"
+ENV_FILE_ENCODING = "utf-8"
 
-class LLMSettings(BaseSettings):
-    """LLM-related configuration settings."""
+
+@cache
+def _read_env_file(path: Path) -> Mapping[str, Optional[str]]:
+    """
+    Parse a ``.env`` file once per process.
+    
+    Settings() calls after the first reuse the parsed values;
+    rebuild_settings() clears this cache to pick up file changes.
+    """
+    if not path.is_file():
+        return MappingProxyType({})
+    return MappingProxyType(dotenv_values(path, encoding=ENV_FILE_ENCODING))
+
+
+class Settings(BaseSettings):
+    """
+    Main application settings.
     
-    model_config = SettingsConfigDict(env_prefix="LLM_")
+    All settings live on this one model so the environment and ``.env`` are
+    read once. Field names are the environment variable names; grouped views
+    such as ``settings.llm.model`` are available as properties.
+    """
     
-    openai_api_key: str = Field(..., description="OpenAI API key")
-    model: str = Field(default="gpt-4o-mini", description="LLM model to use")
-    temperature: float = Field(default=0.2, ge=0.0, le=2.0, description="LLM temperature")
-    max_tokens: int = Field(default=4000, gt=0, description="Maximum tokens for LLM response")
+    # ``.env`` is read through _read_env_file in settings_customise_sources,
+    # so the built-in dotenv source is left without a file.
+    model_config = SettingsConfigDict(
+        env_file=None,
+        case_sensitive=False,
+        extra="ignore"
+    )
     
-    @validator('openai_api_key')
-    def validate_openai_key(cls, v):
-        if not v or v == "your_openai_api_key_here":
-            raise ValueError("OpenAI API key must be provided and valid")
-        return v
-
-
-class VectorDBSettings(BaseSettings):
-    """Vector database configuration settings."""
+    # Basic app settings
+    app_name: str = Field(default="Chatbot Boilerplate", description="Application name")
+    app_version: str = Field(default="0.1.0", description="Application version")
+    environment: Literal["development", "staging", "production"] = Field(
+        default="development", description="Environment (development/production)"
+    )
+    debug: bool = Field(default=True, description="Debug mode")
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
+        default="INFO", description="Logging level"
+    )
+    api_prefix: str = Field(default="/api/v1", description="API prefix")
+    
+    # Server settings
+    host: str = Field(default="0.0.0.0", description="Server host")
+    port: int = Field(default=8000, gt=0, le=65535, description="Server port")
+    workers: int = Field(default=1, gt=0, description="Number of worker processes")
+    
+    # Database settings
+    database_url: str = Field(default="sqlite:///./chatbot.db", description="Database URL")
     
-    model_config = SettingsConfigDict(env_prefix="")
+    # Monitoring
+    metrics_endpoint: str = Field(default="/metrics", description="Metrics endpoint")
+    health_check_endpoint: str = Field(default="/health", description="Health check endpoint")
     
-    provider: str = Field(default="pinecone", description="Vector DB provider")
+    # LLM settings
+    llm_openai_api_key: str = Field(..., description="OpenAI API key")
+    llm_model: str = Field(default="gpt-4o-mini", description="LLM model to use")
+    llm_temperature: float = Field(default=0.2, ge=0.0, le=2.0, description="LLM temperature")
+    llm_max_tokens: int = Field(default=4000, gt=0, description="Maximum tokens for LLM response")
     
-    # Pinecone settings
+    # Vector database settings
+    vector_db_provider: Literal["pinecone", "weaviate", "chroma"] = Field(
+        default="pinecone", description="Vector DB provider"
+    )
     pinecone_api_key: Optional[str] = Field(default=None, description="Pinecone API key")
     pinecone_environment: Optional[str] = Field(default=None, description="Pinecone environment")
     pinecone_index_name: str = Field(default="chatbot-boilerplate-index", description="Pinecone index name")
     pinecone_dimension: int = Field(default=1536, description="Pinecone vector dimension")
     pinecone_metric: str = Field(default="cosine", description="Pinecone similarity metric")
-    
-    # Weaviate settings
     weaviate_url: Optional[str] = Field(default=None, description="Weaviate URL")
     weaviate_api_key: Optional[str] = Field(default=None, description="Weaviate API key")
-    
-    # Chroma settings
     chroma_host: Optional[str] = Field(default="localhost", description="Chroma host")
     chroma_port: Optional[int] = Field(default=8000, description="Chroma port")
     chroma_collection_name: str = Field(default="chatbot_collection", description="Chroma collection name")
     
-    @validator('provider')
-    def validate_provider(cls, v):
-        allowed_providers = ["pinecone", "weaviate", "chroma"]
-        if v not in allowed_providers:
-            raise ValueError(f"Vector DB provider must be one of: {allowed_providers}")
-        return v
-
-
-class CacheSettings(BaseSettings):
-    """Caching configuration settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="CACHE_")
-    
-    backend: str = Field(default="memory", description="Cache backend type")
-    ttl: int = Field(default=3600, gt=0, description="Cache TTL in seconds")
-    max_size: int = Field(default=1000, gt=0, description="Maximum cache size")
-    
-    # Redis settings
-    redis_url: Optional[str] = Field(default=None, description="Redis URL")
-    redis_password: Optional[str] = Field(default=None, description="Redis password")
-    redis_db: int = Field(default=0, description="Redis database number")
-
-
-class RateLimitSettings(BaseSettings):
-    """Rate limiting configuration settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="RATE_LIMIT_")
-    
-    enabled: bool = Field(default=True, description="Enable rate limiting")
-    requests: int = Field(default=100, gt=0, description="Number of requests allowed")
-    window: int = Field(default=60, gt=0, description="Time window in seconds")
-    storage: str = Field(default="memory", description="Rate limit storage backend")
-
-
-class SecuritySettings(BaseSettings):
-    """Security-related configuration settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="")
-    
-    secret_key: str = Field(..., description="Secret key for JWT and encryption")
+    # Cache settings
+    cache_backend: str = Field(default="memory", description="Cache backend type")
+    cache_ttl: int = Field(default=3600, gt=0, description="Cache TTL in seconds")
+    cache_max_size: int = Field(default=1000, gt=0, description="Maximum cache size")
+    cache_redis_url: Optional[str] = Field(default=None, description="Redis URL")
+    cache_redis_password: Optional[str] = Field(default=None, description="Redis password")
+    cache_redis_db: int = Field(default=0, description="Redis database number")
+    
+    # Rate limiting settings
+    rate_limit_enabled: bool = Field(default=True, description="Enable rate limiting")
+    rate_limit_requests: int = Field(default=100, gt=0, description="Number of requests allowed")
+    rate_limit_window: int = Field(default=60, gt=0, description="Time window in seconds")
+    rate_limit_storage: str = Field(default="memory", description="Rate limit storage backend")
+    
+    # Security settings
+    secret_key: str = Field(..., min_length=32, description="Secret key for JWT and encryption")
     algorithm: str = Field(default="HS256", description="JWT algorithm")
     access_token_expire_minutes: int = Field(default=30, gt=0, description="Access token expiration")
-    
-    # CORS settings
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:8080"],
         description="Allowed CORS origins"
@@ -106,103 +122,149 @@ class SecuritySettings(BaseSettings):
     )
     cors_allow_headers: List[str] = Field(default=["*"], description="Allowed CORS headers")
     
-    @validator('secret_key')
-    def validate_secret_key(cls, v):
-        if not v or v == "your_secret_key_here_change_in_production":
-            raise ValueError("Secret key must be provided and changed from default")
-        if len(v) < 32:
-            raise ValueError("Secret key must be at least 32 characters long")
-        return v
-
-
-class GuardrailSettings(BaseSettings):
-    """Content safety and guardrail settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="")
-    
+    # Content safety and guardrail settings
     enable_content_guardrails: bool = Field(default=True, description="Enable content guardrails")
     max_input_length: int = Field(default=5000, gt=0, description="Maximum input length")
     max_output_length: int = Field(default=8000, gt=0, description="Maximum output length")
     blocked_words_file: Optional[str] = Field(default=None, description="Path to blocked words file")
-
-
-class SessionSettings(BaseSettings):
-    """Session management settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="SESSION_")
-    
-    ttl: int = Field(default=86400, gt=0, description="Session TTL in seconds")
-    max_sessions_per_user: int = Field(default=10, gt=0, description="Max sessions per user")
-    cleanup_interval: int = Field(default=3600, gt=0, description="Session cleanup interval")
-
-
-class FeatureFlags(BaseSettings):
-    """Feature flag settings."""
-    
-    model_config = SettingsConfigDict(env_prefix="ENABLE_")
-    
-    auto_user_detection: bool = Field(default=True, description="Enable automatic user type detection")
-    multi_stage_workflows: bool = Field(default=True, description="Enable multi-stage workflows")
-    dynamic_prompting: bool = Field(default=True, description="Enable dynamic system prompting")
-    conversation_memory: bool = Field(default=True, description="Enable conversation memory")
-    tool_validation: bool = Field(default=True, description="Enable tool validation")
-    metrics: bool = Field(default=True, description="Enable metrics collection")
-    content_guardrails: bool = Field(default=True, description="Enable content guardrails")
-
-
-class Settings(BaseSettings):
-    """Main application settings."""
-    
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore"
-    )
-    
-    # Basic app settings
-    app_name: str = Field(default="Chatbot Boilerplate", description="Application name")
-    app_version: str = Field(default="0.1.0", description="Application version")
-    environment: str = Field(default="development", description="Environment (development/production)")
-    debug: bool = Field(default=True, description="Debug mode")
-    log_level: str = Field(default="INFO", description="Logging level")
-    api_prefix: str = Field(default="/api/v1", description="API prefix")
-    
-    # Server settings
-    host: str = Field(default="0.0.0.0", description="Server host")
-    port: int = Field(default=8000, gt=0, le=65535, description="Server port")
-    workers: int = Field(default=1, gt=0, description="Number of worker processes")
     
-    # Database settings
-    database_url: str = Field(default="sqlite:///./chatbot.db", description="Database URL")
-    
-    # Monitoring
-    metrics_endpoint: str = Field(default="/metrics", description="Metrics endpoint")
-    health_check_endpoint: str = Field(default="/health", description="Health check endpoint")
+    # Session settings
+    session_ttl: int = Field(default=86400, gt=0, description="Session TTL in seconds")
+    session_max_sessions_per_user: int = Field(default=10, gt=0, description="Max sessions per user")
+    session_cleanup_interval: int = Field(default=3600, gt=0, description="Session cleanup interval")
+    
+    # Feature flags
+    enable_auto_user_detection: bool = Field(default=True, description="Enable automatic user type detection")
+    enable_multi_stage_workflows: bool = Field(default=True, description="Enable multi-stage workflows")
+    enable_dynamic_prompting: bool = Field(default=True, description="Enable dynamic system prompting")
+    enable_conversation_memory: bool = Field(default=True, description="Enable conversation memory")
+    enable_tool_validation: bool = Field(default=True, description="Enable tool validation")
+    enable_metrics: bool = Field(default=True, description="Enable metrics collection")
+    
+    @classmethod
+    def settings_customise_sources(
+        cls, settings_cls, init_settings, env_settings, dotenv_settings, file_secret_settings
+    ):
+        env_file_values = _read_env_file(Path(ENV_FILE).resolve())
+        return (
+            init_settings,
+            env_settings,
+            InitSettingsSource(settings_cls, _field_values(env_file_values, "DotEnvSettingsSource")),
+            file_secret_settings,
+        )
+    
+    @field_validator('llm_openai_api_key')
+    @classmethod
+    def validate_openai_key(cls, v):
+        if not v or v == "your_openai_api_key_here":
+            raise ValueError("OpenAI API key must be provided and valid")
+        return v
     
-    # Nested settings
-    llm: LLMSettings = Field(default_factory=LLMSettings)
-    vector_db: VectorDBSettings = Field(default_factory=VectorDBSettings)
-    cache: CacheSettings = Field(default_factory=CacheSettings)
-    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
-    security: SecuritySettings = Field(default_factory=SecuritySettings)
-    guardrails: GuardrailSettings = Field(default_factory=GuardrailSettings)
-    sessions: SessionSettings = Field(default_factory=SessionSettings)
-    features: FeatureFlags = Field(default_factory=FeatureFlags)
-    
-    @validator('environment')
-    def validate_environment(cls, v):
-        allowed_envs = ["development", "staging", "production"]
-        if v not in allowed_envs:
-            raise ValueError(f"Environment must be one of: {allowed_envs}")
+    @field_validator('secret_key')
+    @classmethod
+    def validate_secret_key(cls, v):
+        if v == "your_secret_key_here_change_in_production":
+            raise ValueError("Secret key must be provided and changed from default")
         return v
     
-    @validator('log_level')
-    def validate_log_level(cls, v):
-        allowed_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-        if v.upper() not in allowed_levels:
-            raise ValueError(f"Log level must be one of: {allowed_levels}")
-        return v.upper()
+    @field_validator('log_level', mode='before')
+    @classmethod
+    def normalize_log_level(cls, v):
+        return v.upper() if isinstance(v, str) else v
+    
+    @cached_property
+    def llm(self) -> SimpleNamespace:
+        """LLM-related configuration settings."""
+        return SimpleNamespace(
+            openai_api_key=self.llm_openai_api_key,
+            model=self.llm_model,
+            temperature=self.llm_temperature,
+            max_tokens=self.llm_max_tokens,
+        )
+    
+    @cached_property
+    def vector_db(self) -> SimpleNamespace:
+        """Vector database configuration settings."""
+        return SimpleNamespace(
+            provider=self.vector_db_provider,
+            pinecone_api_key=self.pinecone_api_key,
+            pinecone_environment=self.pinecone_environment,
+            pinecone_index_name=self.pinecone_index_name,
+            pinecone_dimension=self.pinecone_dimension,
+            pinecone_metric=self.pinecone_metric,
+            weaviate_url=self.weaviate_url,
+            weaviate_api_key=self.weaviate_api_key,
+            chroma_host=self.chroma_host,
+            chroma_port=self.chroma_port,
+            chroma_collection_name=self.chroma_collection_name,
+        )
+    
+    @cached_property
+    def cache(self) -> SimpleNamespace:
+        """Caching configuration settings."""
+        return SimpleNamespace(
+            backend=self.cache_backend,
+            ttl=self.cache_ttl,
+            max_size=self.cache_max_size,
+            redis_url=self.cache_redis_url,
+            redis_password=self.cache_redis_password,
+            redis_db=self.cache_redis_db,
+        )
+    
+    @cached_property
+    def rate_limit(self) -> SimpleNamespace:
+        """Rate limiting configuration settings."""
+        return SimpleNamespace(
+            enabled=self.rate_limit_enabled,
+            requests=self.rate_limit_requests,
+            window=self.rate_limit_window,
+            storage=self.rate_limit_storage,
+        )
+    
+    @cached_property
+    def security(self) -> SimpleNamespace:
+        """Security-related configuration settings."""
+        return SimpleNamespace(
+            secret_key=self.secret_key,
+            algorithm=self.algorithm,
+            access_token_expire_minutes=self.access_token_expire_minutes,
+            cors_origins=self.cors_origins,
+            cors_allow_credentials=self.cors_allow_credentials,
+            cors_allow_methods=self.cors_allow_methods,
+            cors_allow_headers=self.cors_allow_headers,
+        )
+    
+    @cached_property
+    def guardrails(self) -> SimpleNamespace:
+        """Content safety and guardrail settings."""
+        return SimpleNamespace(
+            enable_content_guardrails=self.enable_content_guardrails,
+            max_input_length=self.max_input_length,
+            max_output_length=self.max_output_length,
+            blocked_words_file=self.blocked_words_file,
+        )
+    
+    @cached_property
+    def sessions(self) -> SimpleNamespace:
+        """Session management settings."""
+        return SimpleNamespace(
+            ttl=self.session_ttl,
+            max_sessions_per_user=self.session_max_sessions_per_user,
+            cleanup_interval=self.session_cleanup_interval,
+        )
+    
+    @cached_property
+    def features(self) -> SimpleNamespace:
+        """Feature flag settings."""
+        return SimpleNamespace(
+            auto_user_detection=self.enable_auto_user_detection,
+            multi_stage_workflows=self.enable_multi_stage_workflows,
+            dynamic_prompting=self.enable_dynamic_prompting,
+            conversation_memory=self.enable_conversation_memory,
+            tool_validation=self.enable_tool_validation,
+            metrics=self.enable_metrics,
+            content_guardrails=self.enable_content_guardrails,
+        )
     
     @property
     def is_development(self) -> bool:
@@ -214,28 +276,110 @@ class Settings(BaseSettings):
         """Check if running in production mode."""
         return self.environment == "production"
     
-    def get_db_config(self) -> Dict[str, Any]:
-        """Get database configuration dictionary."""
-        return {
+    @cached_property
+    def db_config(self) -> Mapping[str, Any]:
+        """Database configuration, as a read-only mapping."""
+        return MappingProxyType({
             "url": self.database_url,
             "echo": self.debug and self.is_development,
             "future": True
-        }
+        })
     
-    def get_cors_config(self) -> Dict[str, Any]:
-        """Get CORS configuration dictionary."""
-        return {
+    @cached_property
+    def cors_config(self) -> Mapping[str, Any]:
+        """CORS configuration, as a read-only mapping."""
+        return MappingProxyType({
             "allow_origins": self.security.cors_origins,
             "allow_credentials": self.security.cors_allow_credentials,
             "allow_methods": self.security.cors_allow_methods,
             "allow_headers": self.security.cors_allow_headers
-        }
+        })
+    
+    def get_db_config(self) -> Mapping[str, Any]:
+        """Get database configuration dictionary."""
+        return self.db_config
+    
+    def get_cors_config(self) -> Mapping[str, Any]:
+        """Get CORS configuration dictionary."""
+        return self.cors_config
+
+
+# Field lookup by environment variable name, and the fields pydantic-settings
+# expects as JSON, resolved once for the fast construction path.
+_ENV_FIELDS = {name.upper(): name for name in Settings.model_fields}
+_JSON_FIELDS = frozenset(
+    name for name, field in Settings.model_fields.items()
+    if get_origin(field.annotation) in (list, dict)
+)
+
 
+class _FastSettings(Settings):
+    """Settings that only take constructor values, with no env or ``.env`` sources."""
+    
+    @classmethod
+    def settings_customise_sources(
+        cls, settings_cls, init_settings, env_settings, dotenv_settings, file_secret_settings
+    ):
+        return (init_settings,)
 
+
+def _field_values(variables: Mapping[str, Optional[str]], source: str) -> Dict[str, Any]:
+    """
+    Pick the settings fields out of ``variables``, keyed by field name.
+    
+    List and dict fields are decoded from JSON, as pydantic-settings does for
+    its env sources; ``source`` names the origin in the parse error.
+    """
+    values = {}
+    for key, value in variables.items():
+        name = _ENV_FIELDS.get(key.upper())
+        if name is None or value is None:
+            continue
+        if name in _JSON_FIELDS:
+            try:
+                value = json.loads(value)
+            except ValueError as e:
+                raise SettingsError(
+                    f'error parsing value for field "{name}" from source "{source}"'
+                ) from e
+        values[name] = value
+    return values
+
+
+def _build_fast_settings() -> Settings:
+    """
+    Build settings from a single pass over ``os.environ``.
+    
+    Skips the per-field lookups of the pydantic-settings env and ``.env``
+    sources and passes the matching variables in directly; validation still
+    runs. The ``.env`` file is not read, so this suits deployments that inject
+    configuration through the environment.
+    """
+    return _FastSettings(**_field_values(os.environ, "EnvSettingsSource"))
+
+
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings instance."""
+    """
+    Get application settings instance.
+    
+    The instance is built once and shared; call ``get_settings.cache_clear()``
+    after changing environment variables. Set ``FAST_SETTINGS=1`` to build it
+    from the process environment only.
+    """
+    if os.getenv("FAST_SETTINGS") == "1":
+        return _build_fast_settings()
     return Settings()
 
 
+def rebuild_settings() -> Settings:
+    """Re-read the environment and ``.env``, and replace ``settings``."""
+    global settings
+    _read_env_file.cache_clear()
+    get_settings.cache_clear()
+    settings = get_settings()
+    return settings
+
+
 # Global settings instance
-settings = get_settings() 
\ No newline at end of file
+settings = get_settings()
@@ -7,37 +7,58 @@ This script provides convenient commands to run different test suites.
 import sys
 import subprocess
 import argparse
+from functools import lru_cache
 from pathlib import Path
 
 
-def run_command(cmd, description):
-    """Run a command and handle the output."""
+SUITES = {
+    "unit": ("tests/test_chat_utils.py", "tests/test_chat_state.py", "tests/test_chat_nodes.py"),
+    "integration": ("tests/test_chat_agent.py", "tests/test_chat_graph.py"),
+    "edge-cases": ("tests/test_edge_cases.py",),
+    "all": ("tests/",),
+}
+
+# pytest output flag for each --verbosity level
+VERBOSITY_FLAGS = ("-q", None, "-v")
+
+
+def run_pytest(pytest_args, description, in_process=True):
+    """Run pytest with the given arguments and handle the output."""
     print(f"\n{'='*60}")
     print(f"Running: {description}")
-    print(f"Command: {' '.join(cmd)}")
+    print(f"Command: python -m pytest {' '.join(pytest_args)}")
     print(f"{'='*60}")
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=False)
-        print(f"✅ {description} completed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed with exit code {e.returncode}")
-        return False
-    except FileNotFoundError:
-        print(f"❌ Command not found: {cmd[0]}")
+        if in_process:
+            import pytest
+            returncode = pytest.main(pytest_args)
+        else:
+            # pytest-xdist manages its own worker processes; run it from a CLI.
+            returncode = subprocess.run([sys.executable, "-m", "pytest", *pytest_args]).returncode
+    except ImportError:
+        print("❌ pytest is not installed")
         print("Make sure pytest is installed: pip install pytest pytest-asyncio")
         return False
+    
+    if returncode == 0:
+        print(f"✅ {description} completed successfully")
+        return True
+    
+    print(f"❌ {description} failed with exit code {int(returncode)}")
+    return False
 
 
-def main():
+@lru_cache(maxsize=1)
+def _get_parser():
+    """Build the command-line parser once."""
     parser = argparse.ArgumentParser(
         description="Test runner for chatbot boilerplate",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   python run_tests.py                    # Run all tests
-  python run_tests.py --unit             # Run only unit tests
+  python run_tests.py --suite unit       # Run only unit tests
   python run_tests.py --integration      # Run only integration tests
   python run_tests.py --coverage         # Run tests with coverage report
   python run_tests.py --verbose          # Run tests with verbose output
@@ -45,19 +66,31 @@ Examples:
         """
     )
     
+    parser.add_argument(
+        "--suite", 
+        choices=list(SUITES), 
+        default="all", 
+        help="Test suite to run"
+    )
     parser.add_argument(
         "--unit", 
-        action="store_true", 
+        dest="suite", 
+        action="store_const", 
+        const="unit", 
         help="Run only unit tests (utils, states, nodes)"
     )
     parser.add_argument(
         "--integration", 
-        action="store_true", 
+        dest="suite", 
+        action="store_const", 
+        const="integration", 
         help="Run only integration tests (agent, graph)"
     )
     parser.add_argument(
         "--edge-cases", 
-        action="store_true", 
+        dest="suite", 
+        action="store_const", 
+        const="edge-cases", 
         help="Run only edge case tests"
     )
     parser.add_argument(
@@ -65,14 +98,25 @@ Examples:
         action="store_true", 
         help="Run tests with coverage report"
     )
+    parser.add_argument(
+        "--verbosity", 
+        type=int, 
+        choices=[0, 1, 2], 
+        default=1, 
+        help="Output level: 0 minimal, 1 normal, 2 verbose"
+    )
     parser.add_argument(
         "--verbose", "-v", 
-        action="store_true", 
+        dest="verbosity", 
+        action="store_const", 
+        const=2, 
         help="Run tests with verbose output"
     )
     parser.add_argument(
         "--fast", 
-        action="store_true", 
+        dest="verbosity", 
+        action="store_const", 
+        const=0, 
         help="Run tests with minimal output"
     )
     parser.add_argument(
@@ -86,34 +130,25 @@ Examples:
         help="Run specific test file"
     )
     
-    args = parser.parse_args()
-    
-    # Base pytest command
-    base_cmd = ["python", "-m", "pytest"]
+    return parser
+
+
+def main():
+    args = _get_parser().parse_args()
     
     # Determine test selection
-    if args.unit:
-        test_files = ["tests/test_chat_utils.py", "tests/test_chat_state.py", "tests/test_chat_nodes.py"]
-    elif args.integration:
-        test_files = ["tests/test_chat_agent.py", "tests/test_chat_graph.py"]
-    elif args.edge_cases:
-        test_files = ["tests/test_edge_cases.py"]
-    elif args.file:
-        test_files = [args.file]
+    if args.file:
+        cmd = [args.file]
     else:
-        test_files = ["tests/"]
-    
-    # Build command
-    cmd = base_cmd + test_files
+        cmd = list(SUITES[args.suite])
     
     # Add options
     if args.coverage:
         cmd.extend(["--cov=app", "--cov-report=term-missing", "--cov-report=html"])
     
-    if args.verbose:
-        cmd.append("-v")
-    elif args.fast:
-        cmd.append("-q")
+    verbosity_flag = VERBOSITY_FLAGS[args.verbosity]
+    if verbosity_flag:
+        cmd.append(verbosity_flag)
     
     if args.parallel:
         cmd.extend(["-n", str(args.parallel)])
@@ -122,7 +157,7 @@ Examples:
     cmd.append("--tb=short")
     
     # Run the tests
-    success = run_command(cmd, "Running tests")
+    success = run_pytest(cmd, "Running tests", in_process=not args.parallel)
     
     if args.coverage and success:
         print(f"\n📊 Coverage report generated in htmlcov/index.html")
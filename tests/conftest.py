@@ -2,28 +2,49 @@
 Test configuration and fixtures for chatbot boilerplate tests.
 """
 
-import os
+import sys
+from uuid import uuid4
+
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, Mock, patch
-from typing import Dict
 
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-from app.agents.chat_agent import ChatAgent
-from app.agents.states.chat_state import SessionInfo, ChatState
-from app.agents.nodes.chat_nodes import ChatNodes
-from app.agents.graph.chat_graph import ChatGraphBuilder
+# langchain, langgraph and the app modules are imported inside the fixtures
+# that need them, so collecting conftest stays cheap.
 
 
-@pytest.fixture
+if uvloop is not None:
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop, matching the server's event loop."""
+        return {"uvloop": uvloop.new_event_loop}
+
+
+class _FakeLLM:
+    """Lightweight chat model stand-in that answers every request with ``content``."""
+    
+    def __init__(self, content: str = "Mock AI response"):
+        self.content = content
+    
+    async def ainvoke(self, messages, config=None, **kwargs):
+        from langchain_core.messages import AIMessage
+        
+        return AIMessage(content=self.content)
+    
+    async def abatch(self, inputs, config=None, **kwargs):
+        from langchain_core.messages import AIMessage
+        
+        return [AIMessage(content=self.content) for _ in inputs]
+
+
+@pytest.fixture(scope="session")
 def mock_openai_llm():
     """Mock OpenAI LLM for testing."""
-    mock_llm = Mock(spec=ChatOpenAI)
-    mock_llm.ainvoke = AsyncMock(return_value=AIMessage(content="Mock AI response"))
-    return mock_llm
+    return _FakeLLM()
 
 
 @pytest.fixture
@@ -32,44 +53,100 @@ def mock_sessions():
     return {}
 
 
+@pytest.fixture(scope="module")
+def shared_chat_nodes(mock_openai_llm):
+    """Create one ChatNodes instance per test module."""
+    from app.agents.nodes.chat_nodes import ChatNodes
+    
+    return ChatNodes(llm=mock_openai_llm, sessions={})
+
+
+@pytest.fixture(scope="module")
+def shared_chat_nodes_no_llm():
+    """Create one LLM-less ChatNodes instance per test module."""
+    from app.agents.nodes.chat_nodes import ChatNodes
+    
+    return ChatNodes(llm=None, sessions={})
+
+
 @pytest.fixture
-def chat_nodes(mock_openai_llm, mock_sessions):
-    """Create ChatNodes instance for testing."""
-    return ChatNodes(llm=mock_openai_llm, sessions=mock_sessions)
+def chat_nodes(shared_chat_nodes):
+    """The module's ChatNodes instance, with sessions cleared for this test."""
+    shared_chat_nodes.sessions.clear()
+    return shared_chat_nodes
 
 
 @pytest.fixture
-def chat_nodes_no_llm(mock_sessions):
-    """Create ChatNodes instance without LLM for testing fallback behavior."""
-    return ChatNodes(llm=None, sessions=mock_sessions)
+def chat_nodes_no_llm(shared_chat_nodes_no_llm):
+    """The module's LLM-less ChatNodes instance, with sessions cleared for this test."""
+    shared_chat_nodes_no_llm.sessions.clear()
+    return shared_chat_nodes_no_llm
 
 
 @pytest.fixture
 def graph_builder(chat_nodes):
     """Create ChatGraphBuilder instance for testing."""
+    from app.agents.graph.chat_graph import ChatGraphBuilder
+    
     return ChatGraphBuilder(chat_nodes)
 
 
+@pytest.fixture(scope="session")
+def compiled_graph():
+    """Compile the chat graph once for tests that don't inspect its checkpointer."""
+    from langgraph.checkpoint.memory import MemorySaver
+    from app.agents.graph.chat_graph import ChatGraphBuilder
+    from app.agents.nodes.chat_nodes import ChatNodes
+    
+    return ChatGraphBuilder(ChatNodes(llm=_FakeLLM(), sessions={})).build_graph(MemorySaver())
+
+
 @pytest.fixture
 def memory_saver():
     """Create MemorySaver instance for testing."""
+    from langgraph.checkpoint.memory import MemorySaver
+    
     return MemorySaver()
 
 
-@pytest.fixture
-def sample_chat_state():
-    """Create sample ChatState for testing."""
-    return {
-        "messages": [HumanMessage(content="Hello, how are you?")],
+@pytest.fixture(scope="session")
+def chat_state_template():
+    """Read-only ChatState that ``sample_chat_state`` copies from."""
+    from types import MappingProxyType
+    from langchain_core.messages import HumanMessage
+    
+    # The fixed id stops add_messages from assigning (and so mutating) an id
+    # on this shared message.
+    return MappingProxyType({
+        "messages": (HumanMessage(content="Hello, how are you?", id="sample-human"),),
         "session_id": "test_session_123",
         "user_type": "customer",
         "processed": False
-    }
+    })
 
 
 @pytest.fixture
+def sample_chat_state(chat_state_template):
+    """Create sample ChatState for testing."""
+    return {**chat_state_template, "messages": list(chat_state_template["messages"])}
+
+
+@pytest.fixture
+def sid(worker_id):
+    """Build session ids that are unique to this test and xdist worker."""
+    suffix = f"{worker_id}-{uuid4().hex[:6]}"
+    
+    def make(name: str) -> str:
+        return f"{name}-{suffix}"
+    
+    return make
+
+
+@pytest.fixture(scope="session")
 def sample_session_info():
     """Create sample SessionInfo for testing."""
+    from app.agents.states.chat_state import SessionInfo
+    
     return SessionInfo(
         session_id="test_session_123",
         message_count=5,
@@ -77,57 +154,162 @@ def sample_session_info():
     )
 
 
-@pytest_asyncio.fixture
-async def initialized_chat_agent():
-    """Create and initialize a ChatAgent for testing."""
-    # Temporarily set mock API key for testing
-    original_api_key = os.environ.get("OPENAI_API_KEY")
-    os.environ["OPENAI_API_KEY"] = "test_api_key"
-    
-    # Mock the ChatOpenAI class to avoid actual API calls
-    with patch("app.agents.chat_agent.ChatOpenAI") as mock_openai_class:
-        mock_llm = Mock(spec=ChatOpenAI)
-        mock_llm.ainvoke = AsyncMock(return_value=AIMessage(content="Test response"))
-        mock_openai_class.return_value = mock_llm
-        
-        agent = ChatAgent()
-        await agent.initialize()
+async def _fake_llm_agent():
+    """Create and initialize a ChatAgent backed by ``_FakeLLM``."""
+    from app.agents.chat_agent import ChatAgent
+    
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+        # Keep the in-memory checkpointer; the fixtures clear it between tests
+        monkeypatch.delenv("REDIS_URL", raising=False)
         
-        # Verify the agent is properly mocked
-        assert agent.llm is not None
-        assert agent.chat_nodes is not None
-        assert agent.graph is not None
+        # Swap in a fake LLM so the graph runs in-process without API calls
+        with patch("app.agents.chat_agent.get_llm", return_value=_FakeLLM("Test response")):
+            agent = ChatAgent()
+            await agent.initialize()
+    
+    # Verify the agent is properly mocked
+    assert agent.llm is not None
+    assert agent.chat_nodes is not None
+    assert agent.graph is not None
+    
+    return agent
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def shared_chat_agent():
+    """Create and initialize one ChatAgent for the whole test session."""
+    agent = await _fake_llm_agent()
     
     yield agent
     
-    # Restore original API key
-    if original_api_key:
-        os.environ["OPENAI_API_KEY"] = original_api_key
-    elif "OPENAI_API_KEY" in os.environ:
-        del os.environ["OPENAI_API_KEY"]
+    await agent.shutdown()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def seeded_session():
+    """A session with two completed turns, shared by read-only tests.
+    
+    Lives on its own agent because ``initialized_chat_agent`` wipes the
+    shared agent's state before every test.
+    """
+    agent = await _fake_llm_agent()
+    session_id = "seeded_session"
+    
+    await agent.chat("Hello!", session_id=session_id, user_type="manager")
+    await agent.chat("How are you?", session_id=session_id, user_type="manager")
+    
+    yield agent, session_id
+    
+    await agent.shutdown()
+
+
+@pytest.fixture
+def bare_agent():
+    """A ChatAgent that has not been initialized (no graph, LLM or nodes)."""
+    from app.agents.chat_agent import ChatAgent
+    
+    return ChatAgent()
+
+
+@pytest.fixture
+def initialized_chat_agent(shared_chat_agent):
+    """The shared ChatAgent, with sessions and checkpoints cleared for this test."""
+    shared_chat_agent.sessions.clear()
+    for thread_id in list(shared_chat_agent.memory.storage):
+        shared_chat_agent.memory.delete_thread(thread_id)
+    return shared_chat_agent
 
 
 @pytest_asyncio.fixture
-async def chat_agent_no_api_key():
-    """Create ChatAgent without API key for testing fallback behavior."""
-    # Ensure no API key is set
-    original_api_key = os.environ.get("OPENAI_API_KEY")
-    if "OPENAI_API_KEY" in os.environ:
-        del os.environ["OPENAI_API_KEY"]
+async def live_chat_agent():
+    """Create a ChatAgent backed by the real provider; skipped without an API key."""
+    import os
+    from app.agents.chat_agent import ChatAgent
+    
+    if not os.getenv("OPENAI_API_KEY"):
+        pytest.skip("OPENAI_API_KEY is not set")
     
     agent = ChatAgent()
     await agent.initialize()
     
     yield agent
     
-    # Restore original API key
-    if original_api_key:
-        os.environ["OPENAI_API_KEY"] = original_api_key
+    await agent.shutdown()
+
+
+@pytest_asyncio.fixture
+async def chat_agent_no_api_key(monkeypatch):
+    """Create ChatAgent without API key for testing fallback behavior."""
+    from app.agents.chat_agent import ChatAgent
+    
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    
+    agent = ChatAgent()
+    await agent.initialize()
+    
+    yield agent
 
 
 @pytest.fixture
+def api_client(monkeypatch):
+    """TestClient for the FastAPI app, with its lifespan run against a fake streaming LLM."""
+    from itertools import cycle
+    from fastapi.testclient import TestClient
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from app.main import app
+    
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    llm = GenericFakeChatModel(messages=cycle([AIMessage(content="Streamed test response")]))
+    
+    # Server errors come back as responses, as they would for a real client
+    with patch("app.agents.chat_agent.get_llm", return_value=llm):
+        with TestClient(app, raise_server_exceptions=False) as client:
+            yield client
+
+
+@pytest.fixture(scope="session")
+def failing_graph():
+    """Compiled-graph stand-in whose runs always raise."""
+    graph = Mock()
+    graph.ainvoke = AsyncMock(side_effect=Exception("Graph error"))
+    graph.astream = Mock(side_effect=Exception("Graph error"))
+    return graph
+
+
+@pytest.fixture(scope="session")
+def empty_response_graph():
+    """Compiled-graph stand-in whose runs return no AI message."""
+    from langchain_core.messages import HumanMessage
+    
+    graph = Mock()
+    graph.ainvoke = AsyncMock(return_value={"messages": [HumanMessage(content="Hello")]})
+    return graph
+
+
+@pytest.fixture(scope="session")
+def corrupted_graph():
+    """Compiled-graph stand-in whose runs return no state at all."""
+    graph = Mock()
+    graph.ainvoke = AsyncMock(return_value=None)
+    return graph
+
+
+@pytest.fixture(scope="session")
+def failing_checkpointer():
+    """Checkpointer stand-in whose reads always raise."""
+    memory = Mock()
+    memory.aget_tuple = AsyncMock(side_effect=Exception("State error"))
+    return memory
+
+
+@pytest.fixture(scope="session")
 def sample_messages():
     """Sample messages for testing."""
+    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+    
     return [
         SystemMessage(content="You are a helpful assistant."),
         HumanMessage(content="Hello!"),
@@ -137,7 +319,14 @@ def sample_messages():
 
 
 @pytest.fixture(autouse=True)
-def clean_environment():
-    """Clean up environment variables after each test."""
+def clear_provider_caches():
+    """Drop cached provider lookups after each test."""
     yield
-    # Clean up any test-specific environment variables if needed 
\ No newline at end of file
+    # Provider lookups are cached per process; drop them so the next test
+    # sees its own environment variables. Nothing is cached if the module
+    # was never imported.
+    llm_provider = sys.modules.get("app.utils.llm_provider")
+    if llm_provider is not None:
+        llm_provider.get_llm.cache_clear()
+        llm_provider.get_available_providers.cache_clear()
+        llm_provider._provider_config_status.cache_clear() 
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Tests for the LLMBatcher micro-batching dispatcher.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from langchain_core.messages import HumanMessage, AIMessage
+
+from app.agents.batcher import LLMBatcher
+from app.agents.nodes.chat_nodes import ChatNodes
+
+
+class RecordingLLM:
+    """Fake LLM that records the size of every batch it receives."""
+
+    def __init__(self, fail_on: str = None):
+        self.batch_sizes = []
+        self.configs = []
+        self.fail_on = fail_on
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        self.batch_sizes.append(len(inputs))
+        self.configs.extend(config)
+        results = []
+        for messages in inputs:
+            content = messages[-1].content
+            if content == self.fail_on:
+                results.append(RuntimeError("API Error"))
+            else:
+                results.append(AIMessage(content=f"echo: {content}"))
+        return results
+
+
+class TestLLMBatcher:
+    """Test cases for LLMBatcher."""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_response(self):
+        """Test that a single request gets its own response."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=1)
+
+        response = await batcher.submit([HumanMessage(content="Hello")])
+        await batcher.close()
+
+        assert response.content == "echo: Hello"
+        assert llm.batch_sizes == [1]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self):
+        """Test that concurrent requests share one batch."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=20)
+
+        responses = await asyncio.gather(*[
+            batcher.submit([HumanMessage(content=f"msg {i}")]) for i in range(5)
+        ])
+        await batcher.close()
+
+        assert [r.content for r in responses] == [f"echo: msg {i}" for i in range(5)]
+        assert llm.batch_sizes == [5]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_splits_requests(self):
+        """Test that batches never exceed max_batch."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=20, max_batch=2)
+
+        await asyncio.gather(*[
+            batcher.submit([HumanMessage(content=f"msg {i}")]) for i in range(5)
+        ])
+        await batcher.close()
+
+        assert sum(llm.batch_sizes) == 5
+        assert max(llm.batch_sizes) <= 2
+
+    @pytest.mark.asyncio
+    async def test_bins_are_batched_separately(self):
+        """Test that requests in different bins never share a batch."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=20)
+
+        responses = await asyncio.gather(
+            batcher.submit([HumanMessage(content="a")], "customer"),
+            batcher.submit([HumanMessage(content="b")], "manager"),
+            batcher.submit([HumanMessage(content="c")], "customer"),
+        )
+        await batcher.close()
+
+        assert [r.content for r in responses] == ["echo: a", "echo: b", "echo: c"]
+        assert sorted(llm.batch_sizes) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failure_is_isolated_to_request(self):
+        """Test that one failing request doesn't fail the rest of its batch."""
+        llm = RecordingLLM(fail_on="bad")
+        batcher = LLMBatcher(llm, window_ms=20)
+
+        results = await asyncio.gather(
+            batcher.submit([HumanMessage(content="good")]),
+            batcher.submit([HumanMessage(content="bad")]),
+            return_exceptions=True
+        )
+        await batcher.close()
+
+        assert results[0].content == "echo: good"
+        assert isinstance(results[1], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_inflight_batch(self):
+        """Test that closing mid-batch cancels the waiting callers instead of hanging them."""
+        llm = RecordingLLM()
+        started = asyncio.Event()
+        recorded_abatch = llm.abatch
+
+        async def slow_abatch(inputs, config=None, return_exceptions=False):
+            started.set()
+            await asyncio.sleep(10)
+            return await recorded_abatch(inputs, config, return_exceptions)
+
+        llm.abatch = slow_abatch
+        batcher = LLMBatcher(llm, window_ms=1)
+
+        caller = asyncio.create_task(batcher.submit([HumanMessage(content="Hello")]))
+        await started.wait()
+        await batcher.close()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(caller, timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_configs_are_passed_per_request(self):
+        """Test that each request's RunnableConfig reaches the batched call."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=20)
+        configs = [{"tags": ["first"]}, {"metadata": {"run": "second"}}]
+
+        await asyncio.gather(*[
+            batcher.submit([HumanMessage(content=f"msg {i}")], config=config)
+            for i, config in enumerate(configs)
+        ])
+        await batcher.close()
+
+        assert llm.batch_sizes == [2]
+        assert llm.configs == configs
+
+    @pytest.mark.asyncio
+    async def test_node_uses_batcher(self, mock_sessions):
+        """Test that llm_processing_node routes through the batcher when set."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=1)
+        nodes = ChatNodes(llm=llm, sessions=mock_sessions, batcher=batcher)
+
+        state = {
+            "messages": [HumanMessage(content="Hello")],
+            "session_id": "batcher_test",
+            "user_type": "customer",
+            "processed": False
+        }
+
+        config = {"callbacks": [], "tags": ["chat"], "configurable": {"thread_id": "batcher_test"}}
+
+        result = await nodes.llm_processing_node(state, config)
+        await batcher.close()
+
+        assert result["messages"][-1].content == "echo: Hello"
+        assert llm.batch_sizes == [1]
+        assert llm.configs == [config]
+
+    @pytest.mark.asyncio
+    async def test_node_bins_unknown_user_types_as_customer(self, mock_sessions):
+        """Test that arbitrary user types don't each get their own batcher queue."""
+        llm = RecordingLLM()
+        batcher = LLMBatcher(llm, window_ms=1)
+        nodes = ChatNodes(llm=llm, sessions=mock_sessions, batcher=batcher)
+
+        await asyncio.gather(*[
+            nodes.llm_processing_node({
+                "messages": [HumanMessage(content="Hello")],
+                "session_id": "batcher_test",
+                "user_type": user_type,
+                "processed": False
+            })
+            for user_type in ["manager", "customer", "random-1", "random-2"]
+        ])
+        await batcher.close()
+
+        assert set(batcher.queues) == {"manager", "customer"}
+
+    @pytest.mark.asyncio
+    async def test_streaming_node_bypasses_batcher(self, mock_sessions):
+        """Test that streaming runs call the LLM directly instead of batching."""
+        llm = RecordingLLM()
+        llm.ainvoke = AsyncMock(return_value=AIMessage(content="direct"))
+        batcher = LLMBatcher(llm, window_ms=1)
+        nodes = ChatNodes(llm=llm, sessions=mock_sessions, batcher=batcher)
+
+        state = {
+            "messages": [HumanMessage(content="Hello")],
+            "session_id": "batcher_test",
+            "user_type": "customer",
+            "processed": False
+        }
+
+        result = await nodes.llm_processing_node(state, {"configurable": {"stream": True}})
+        await batcher.close()
+
+        assert result["messages"][-1].content == "direct"
+        assert llm.batch_sizes == []
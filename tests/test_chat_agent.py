@@ -2,7 +2,7 @@
 Tests for ChatAgent class - the main orchestrator.
 """
 
-import os
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
@@ -25,58 +25,60 @@ class TestChatAgentInitialization:
         assert agent.graph_builder is None
         
     @pytest.mark.asyncio
-    async def test_initialize_with_api_key(self):
-        """Test initialization with API key."""
-        with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
-            agent = ChatAgent()
-            
-            # Mock the ChatOpenAI to avoid actual API calls
-            with patch("app.agents.chat_agent.ChatOpenAI") as mock_openai:
-                mock_llm = Mock()
-                mock_openai.return_value = mock_llm
-                
-                await agent.initialize()
-                
-                assert agent.llm == mock_llm
-                assert agent.chat_nodes is not None
-                assert agent.graph_builder is not None
-                assert agent.graph is not None
-                
-    @pytest.mark.asyncio
-    async def test_initialize_without_api_key(self):
-        """Test initialization without API key."""
-        # Ensure no API key is set
-        with patch.dict(os.environ, {}, clear=True):
-            agent = ChatAgent()
-            await agent.initialize()
-            
-            assert agent.llm is None
-            assert agent.chat_nodes is not None
-            assert agent.graph_builder is not None
-            assert agent.graph is not None
-            
-    @pytest.mark.asyncio
-    async def test_initialize_creates_graph_components(self):
-        """Test that initialization creates all necessary components."""
+    @pytest.mark.parametrize("api_key,expect_llm", [
+        ("test_key", True),
+        (None, False),
+    ])
+    async def test_initialize(self, monkeypatch, api_key, expect_llm):
+        """Test that initialization builds every component, with or without an API key."""
+        monkeypatch.delenv("LLM_PROVIDER", raising=False)
+        monkeypatch.delenv("REDIS_URL", raising=False)
+        if api_key:
+            monkeypatch.setenv("OPENAI_API_KEY", api_key)
+        else:
+            monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        
         agent = ChatAgent()
-        await agent.initialize()
         
-        # All components should be created
+        # Mock the ChatOpenAI to avoid actual API calls
+        with patch("app.utils.llm_provider.ChatOpenAI") as mock_openai:
+            await agent.initialize()
+            await agent.shutdown()
+        
+        if expect_llm:
+            assert agent.llm == mock_openai.return_value
+        else:
+            assert agent.llm is None
         assert agent.chat_nodes is not None
         assert agent.graph_builder is not None
         assert agent.graph is not None
         assert agent.memory is not None
+            
+    @pytest.mark.asyncio
+    async def test_initialize_with_warmup(self, monkeypatch):
+        """Test that warm-up sends one request and tolerates failures."""
+        monkeypatch.delenv("REDIS_URL", raising=False)
+        mock_llm = Mock()
+        mock_llm.ainvoke = AsyncMock(side_effect=Exception("Connection error"))
+        
+        with patch("app.agents.chat_agent.get_llm", return_value=mock_llm):
+            agent = ChatAgent()
+            await agent.initialize(warmup=True)
+            await agent.shutdown()
+        
+        mock_llm.ainvoke.assert_awaited_once()
+        assert agent.graph is not None
 
 
 class TestChatFunctionality:
     """Test cases for chat functionality."""
     
     @pytest.mark.asyncio
-    async def test_chat_basic_message(self, initialized_chat_agent):
+    async def test_chat_basic_message(self, initialized_chat_agent, sid):
         """Test basic chat functionality."""
         response = await initialized_chat_agent.chat(
             message="Hello, how are you?",
-            session_id="test_session",
+            session_id=sid("test_session"),
             user_type="customer"
         )
         
@@ -84,17 +86,20 @@ class TestChatFunctionality:
         assert len(response) > 0
         
     @pytest.mark.asyncio
-    async def test_chat_different_user_types(self, initialized_chat_agent):
+    async def test_chat_different_user_types(self, initialized_chat_agent, sid):
         """Test chat with different user types."""
         user_types = ["customer", "support_agent", "manager"]
         
-        for user_type in user_types:
-            response = await initialized_chat_agent.chat(
+        responses = await asyncio.gather(*[
+            initialized_chat_agent.chat(
                 message=f"Hello as {user_type}",
-                session_id=f"session_{user_type}",
+                session_id=sid(f"session_{user_type}"),
                 user_type=user_type
             )
-            
+            for user_type in user_types
+        ])
+        
+        for response in responses:
             assert isinstance(response, str)
             assert len(response) > 0
             
@@ -107,38 +112,29 @@ class TestChatFunctionality:
         assert len(response) > 0
         
     @pytest.mark.asyncio
-    async def test_chat_creates_session(self, initialized_chat_agent):
+    async def test_chat_creates_session(self, initialized_chat_agent, sid):
         """Test that chat creates session entries."""
-        session_id = "new_session_test"
+        session_id = sid("new_session_test")
         
-        print(f"\nBefore chat - Sessions: {initialized_chat_agent.sessions}")
-        print(f"ChatNodes sessions: {initialized_chat_agent.chat_nodes.sessions}")
-        print(f"Same object? {initialized_chat_agent.sessions is initialized_chat_agent.chat_nodes.sessions}")
+        # The agent and its nodes must share one session registry
+        assert initialized_chat_agent.sessions is initialized_chat_agent.chat_nodes.sessions
         
-        response = await initialized_chat_agent.chat(
+        await initialized_chat_agent.chat(
             message="Hello",
             session_id=session_id,
             user_type="customer"
         )
         
-        print(f"Response: {response}")
-        print(f"After chat - Sessions: {initialized_chat_agent.sessions}")
-        print(f"ChatNodes sessions: {initialized_chat_agent.chat_nodes.sessions}")
-        
         assert session_id in initialized_chat_agent.sessions
         session_info = initialized_chat_agent.sessions[session_id]
         assert session_info.session_id == session_id
         assert session_info.user_type == "customer"
         
     @pytest.mark.asyncio
-    async def test_chat_error_handling(self):
+    async def test_chat_error_handling(self, bare_agent, failing_graph):
         """Test chat error handling."""
-        agent = ChatAgent()
-        
-        # Mock a failing graph
-        mock_graph = Mock()
-        mock_graph.ainvoke = AsyncMock(side_effect=Exception("Graph error"))
-        agent.graph = mock_graph
+        agent = bare_agent
+        agent.graph = failing_graph
         
         response = await agent.chat("Hello")
         
@@ -146,16 +142,10 @@ class TestChatFunctionality:
         assert "technical difficulties" in response.lower()
         
     @pytest.mark.asyncio
-    async def test_chat_no_ai_response(self):
+    async def test_chat_no_ai_response(self, bare_agent, empty_response_graph):
         """Test chat when no AI response is generated."""
-        agent = ChatAgent()
-        
-        # Mock a graph that returns no AI messages
-        mock_graph = Mock()
-        mock_graph.ainvoke = AsyncMock(return_value={
-            "messages": [HumanMessage(content="Hello")]
-        })
-        agent.graph = mock_graph
+        agent = bare_agent
+        agent.graph = empty_response_graph
         
         response = await agent.chat("Hello")
         
@@ -167,31 +157,27 @@ class TestSessionManagement:
     """Test cases for session management."""
     
     @pytest.mark.asyncio
-    async def test_session_exists(self, initialized_chat_agent):
+    async def test_session_exists(self, initialized_chat_agent, seeded_session, sid):
         """Test session existence checking."""
-        session_id = "existence_test"
-        
-        # Initially should not exist
-        exists = await initialized_chat_agent.session_exists(session_id)
+        # Unknown sessions should not exist
+        exists = await initialized_chat_agent.session_exists(sid("existence_test"))
         assert not exists
         
         # After chat, should exist
-        await initialized_chat_agent.chat("Hello", session_id=session_id)
-        exists = await initialized_chat_agent.session_exists(session_id)
+        agent, session_id = seeded_session
+        exists = await agent.session_exists(session_id)
         assert exists
         
     @pytest.mark.asyncio
-    async def test_get_session_info(self, initialized_chat_agent):
+    async def test_get_session_info(self, initialized_chat_agent, seeded_session, sid):
         """Test getting session information."""
-        session_id = "info_test"
-        
-        # Initially should return None
-        info = await initialized_chat_agent.get_session_info(session_id)
+        # Unknown sessions should return None
+        info = await initialized_chat_agent.get_session_info(sid("info_test"))
         assert info is None
         
         # After chat, should return session info
-        await initialized_chat_agent.chat("Hello", session_id=session_id, user_type="manager")
-        info = await initialized_chat_agent.get_session_info(session_id)
+        agent, session_id = seeded_session
+        info = await agent.get_session_info(session_id)
         
         assert info is not None
         assert info.session_id == session_id
@@ -199,9 +185,9 @@ class TestSessionManagement:
         assert info.message_count >= 1
         
     @pytest.mark.asyncio
-    async def test_clear_session(self, initialized_chat_agent):
+    async def test_clear_session(self, initialized_chat_agent, sid):
         """Test clearing sessions."""
-        session_id = "clear_test"
+        session_id = sid("clear_test")
         
         # Create session
         await initialized_chat_agent.chat("Hello", session_id=session_id)
@@ -214,19 +200,21 @@ class TestSessionManagement:
         assert not await initialized_chat_agent.session_exists(session_id)
         
     @pytest.mark.asyncio
-    async def test_clear_nonexistent_session(self, initialized_chat_agent):
+    async def test_clear_nonexistent_session(self, initialized_chat_agent, sid):
         """Test clearing a session that doesn't exist."""
         # Should not raise an error
-        await initialized_chat_agent.clear_session("nonexistent_session")
+        await initialized_chat_agent.clear_session(sid("nonexistent_session"))
         
     @pytest.mark.asyncio
-    async def test_multiple_sessions(self, initialized_chat_agent):
+    async def test_multiple_sessions(self, initialized_chat_agent, sid):
         """Test managing multiple sessions."""
-        sessions = ["session1", "session2", "session3"]
+        sessions = [sid("session1"), sid("session2"), sid("session3")]
         
         # Create multiple sessions
-        for session_id in sessions:
-            await initialized_chat_agent.chat(f"Hello {session_id}", session_id=session_id)
+        await asyncio.gather(*[
+            initialized_chat_agent.chat(f"Hello {session_id}", session_id=session_id)
+            for session_id in sessions
+        ])
             
         # All should exist
         for session_id in sessions:
@@ -245,21 +233,17 @@ class TestConversationHistory:
     """Test cases for conversation history."""
     
     @pytest.mark.asyncio
-    async def test_get_conversation_history_empty(self, initialized_chat_agent):
+    async def test_get_conversation_history_empty(self, initialized_chat_agent, sid):
         """Test getting history for empty session."""
-        history = await initialized_chat_agent.get_conversation_history("empty_session")
+        history = await initialized_chat_agent.get_conversation_history(sid("empty_session"))
         assert history == []
         
     @pytest.mark.asyncio
-    async def test_get_conversation_history_with_messages(self, initialized_chat_agent):
+    async def test_get_conversation_history_with_messages(self, seeded_session):
         """Test getting conversation history with messages."""
-        session_id = "history_test"
-        
-        # Have a conversation
-        await initialized_chat_agent.chat("Hello!", session_id=session_id)
-        await initialized_chat_agent.chat("How are you?", session_id=session_id)
+        agent, session_id = seeded_session
         
-        history = await initialized_chat_agent.get_conversation_history(session_id)
+        history = await agent.get_conversation_history(session_id)
         
         # Should have messages
         assert len(history) > 0
@@ -271,28 +255,25 @@ class TestConversationHistory:
             assert msg["type"] in ["human", "ai"]
             
     @pytest.mark.asyncio
-    async def test_get_conversation_history_error_handling(self):
+    async def test_get_conversation_history_error_handling(self, bare_agent, failing_checkpointer, sid):
         """Test conversation history error handling."""
-        agent = ChatAgent()
-        
-        # Mock a failing graph
-        mock_graph = Mock()
-        mock_graph.aget_state = AsyncMock(side_effect=Exception("State error"))
-        agent.graph = mock_graph
+        agent = bare_agent
+        agent.memory = failing_checkpointer
         
-        history = await agent.get_conversation_history("error_session")
+        history = await agent.get_conversation_history(sid("error_session"))
         
         # Should return empty list on error
         assert history == []
+        assert await agent.get_conversation_history_humans(sid("error_session")) == []
 
 
 class TestChatAgentIntegration:
     """Integration tests for complete ChatAgent functionality."""
     
     @pytest.mark.asyncio
-    async def test_full_conversation_flow(self, initialized_chat_agent):
+    async def test_full_conversation_flow(self, initialized_chat_agent, sid):
         """Test a complete conversation flow."""
-        session_id = "full_conversation"
+        session_id = sid("full_conversation")
         
         # Start conversation
         response1 = await initialized_chat_agent.chat(
@@ -320,45 +301,195 @@ class TestChatAgentIntegration:
         assert len(history) >= 2
         
     @pytest.mark.asyncio
-    async def test_concurrent_sessions(self, initialized_chat_agent):
+    @pytest.mark.parametrize("n,concurrency", [(3, 3), (32, 8)])
+    async def test_concurrent_sessions(self, initialized_chat_agent, n, concurrency, sid):
         """Test handling concurrent sessions."""
-        import asyncio
+        user_types = ["customer", "support_agent", "manager"]
+        semaphore = asyncio.Semaphore(concurrency)
         
         async def chat_session(session_id, user_type):
-            return await initialized_chat_agent.chat(
-                f"Hello from {session_id}",
-                session_id=session_id,
-                user_type=user_type
-            )
+            async with semaphore:
+                return await initialized_chat_agent.chat(
+                    f"Hello from {session_id}",
+                    session_id=session_id,
+                    user_type=user_type
+                )
         
         # Create multiple concurrent sessions
-        tasks = [
-            chat_session("concurrent1", "customer"),
-            chat_session("concurrent2", "support_agent"),
-            chat_session("concurrent3", "manager")
-        ]
-        
-        responses = await asyncio.gather(*tasks)
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(chat_session(sid(f"concurrent{i}"), user_types[i % len(user_types)]))
+                for i in range(n)
+            ]
         
         # All should complete successfully
-        for response in responses:
+        for task in tasks:
+            response = task.result()
             assert isinstance(response, str)
             assert len(response) > 0
             
         # All sessions should exist
-        for i in range(1, 4):
-            assert await initialized_chat_agent.session_exists(f"concurrent{i}")
+        for i in range(n):
+            assert await initialized_chat_agent.session_exists(sid(f"concurrent{i}"))
             
     @pytest.mark.asyncio
-    async def test_agent_without_openai_key(self, chat_agent_no_api_key):
+    async def test_concurrent_turns_same_session(self, initialized_chat_agent, sid):
+        """Test that concurrent turns for one session are all kept in its history."""
+        session_id = sid("same_session")
+        
+        await asyncio.gather(*[
+            initialized_chat_agent.chat(f"Turn {i}", session_id=session_id) for i in range(3)
+        ])
+        
+        history = await initialized_chat_agent.get_conversation_history(session_id)
+        human_turns = [msg["content"] for msg in history if msg["type"] == "human"]
+        assert sorted(human_turns) == ["Turn 0", "Turn 1", "Turn 2"]
+        assert initialized_chat_agent.sessions[session_id].message_count == 3
+        
+    @pytest.mark.asyncio
+    async def test_system_prompt_stays_first(self, chat_agent_no_api_key, sid):
+        """Test that the system prompt is added once, ahead of the conversation."""
+        session_id = sid("system_prompt_order")
+        
+        await chat_agent_no_api_key.chat("Hello", session_id=session_id)
+        await chat_agent_no_api_key.chat("Again", session_id=session_id)
+        
+        thread_config = {"configurable": {"thread_id": session_id}}
+        checkpoint_tuple = await chat_agent_no_api_key.memory.aget_tuple(thread_config)
+        messages = checkpoint_tuple.checkpoint["channel_values"]["messages"]
+        
+        assert isinstance(messages[0], SystemMessage)
+        assert sum(isinstance(msg, SystemMessage) for msg in messages) == 1
+        assert [type(msg) for msg in messages[1:]] == [HumanMessage, AIMessage, HumanMessage, AIMessage]
+        
+    @pytest.mark.asyncio
+    async def test_agent_without_openai_key(self, chat_agent_no_api_key, sid):
         """Test agent functionality without OpenAI API key."""
         response = await chat_agent_no_api_key.chat(
             "Hello, test without API key",
-            session_id="no_api_key_test",
+            session_id=sid("no_api_key_test"),
             user_type="customer"
         )
         
         # Should still work with fallback responses
         assert isinstance(response, str)
         assert len(response) > 0
-        assert "mock" in response.lower() or "api key" in response.lower() 
\ No newline at end of file
+        assert "mock" in response.lower() or "api key" in response.lower() 
+
+class TestChatMany:
+    """Test cases for concurrent multi-request chat."""
+    
+    @pytest.mark.asyncio
+    async def test_chat_many_preserves_order(self, chat_agent_no_api_key, sid):
+        """Test that responses come back in request order."""
+        requests = [
+            {"message": "Hello", "session_id": sid("many_1"), "user_type": "customer"},
+            {"message": "Hello", "session_id": sid("many_2"), "user_type": "manager"},
+            {"message": "Hello", "session_id": sid("many_3"), "user_type": "support_agent"},
+        ]
+        
+        responses = await chat_agent_no_api_key.chat_many(requests)
+        
+        assert len(responses) == 3
+        assert "User type: customer" in responses[0]
+        assert "User type: manager" in responses[1]
+        assert "User type: support_agent" in responses[2]
+        for request in requests:
+            assert await chat_agent_no_api_key.session_exists(request["session_id"])
+            
+    @pytest.mark.asyncio
+    async def test_chat_many_same_session_runs_in_order(self, chat_agent_no_api_key, sid):
+        """Test that turns for one session are applied sequentially."""
+        session_id = sid("many_shared")
+        requests = [
+            {"message": "First", "session_id": session_id},
+            {"message": "Second", "session_id": session_id},
+        ]
+        
+        await chat_agent_no_api_key.chat_many(requests, max_concurrent_requests=2)
+        
+        info = await chat_agent_no_api_key.get_session_info(session_id)
+        assert info.message_count == 2
+        
+        history = await chat_agent_no_api_key.get_conversation_history(session_id)
+        human_messages = [msg["content"] for msg in history if msg["type"] == "human"]
+        assert human_messages == ["First", "Second"]
+
+
+class TestChatBatch:
+    """Test cases for sending several messages as one turn."""
+    
+    @pytest.mark.asyncio
+    async def test_chat_batch_counts_every_message(self, initialized_chat_agent, sid):
+        """Test that a batch is answered once but counted per message."""
+        session_id = sid("batch_session")
+        
+        await initialized_chat_agent.chat("Hello", session_id=session_id)
+        response = await initialized_chat_agent.chat_batch(["One", "Two", "Three"], session_id=session_id)
+        
+        assert response == "Test response"
+        history = await initialized_chat_agent.get_conversation_history(session_id)
+        assert [msg["type"] for msg in history] == ["human", "ai", "human", "human", "human", "ai"]
+        assert initialized_chat_agent.sessions[session_id].message_count == 4
+        
+    @pytest.mark.asyncio
+    async def test_chat_batch_failure_keeps_message_count(self, bare_agent, failing_graph):
+        """Test that a batch whose graph run fails adds nothing to message_count."""
+        agent = bare_agent
+        agent.graph = failing_graph
+        agent._bulk_create_sessions(["batch_session"])
+        agent.sessions["batch_session"].message_count = 2
+        
+        response = await agent.chat_batch(["One", "Two", "Three"], session_id="batch_session")
+        
+        assert "technical difficulties" in response
+        assert agent.sessions["batch_session"].message_count == 2
+        
+    @pytest.mark.asyncio
+    async def test_chat_batch_rejects_empty(self, initialized_chat_agent):
+        """Test that an empty batch is refused before running the graph."""
+        with pytest.raises(ValueError):
+            await initialized_chat_agent.chat_batch([])
+
+
+class TestChatStream:
+    """Test cases for streaming chat."""
+    
+    @pytest.mark.asyncio
+    async def test_chat_stream_yields_response(self, chat_agent_no_api_key, sid):
+        """Test that the streamed chunks form the full response."""
+        session_id = sid("stream_session")
+        
+        chunks = [
+            chunk async for chunk in chat_agent_no_api_key.chat_stream("Hello", session_id=session_id)
+        ]
+        
+        assert chunks
+        assert "mock chatbot response" in "".join(chunks)
+        
+        history = await chat_agent_no_api_key.get_conversation_history(session_id)
+        assert [msg["type"] for msg in history] == ["human", "ai"]
+    
+    @pytest.mark.asyncio
+    async def test_chat_stream_error_handling(self, bare_agent, failing_graph):
+        """Test that streaming errors yield the fallback message."""
+        agent = bare_agent
+        agent.graph = failing_graph
+        
+        chunks = [chunk async for chunk in agent.chat_stream("Hello")]
+        
+        assert len(chunks) == 1
+        assert "technical difficulties" in chunks[0]
+
+
+@pytest.mark.live
+class TestLiveChat:
+    """Tests that call the real LLM provider (opt-in, needs OPENAI_API_KEY)."""
+    
+    @pytest.mark.asyncio
+    async def test_live_chat(self, live_chat_agent, sid):
+        """Test a real round trip through the provider."""
+        response = await live_chat_agent.chat("Say hello in one word.", session_id=sid("live_session"))
+        
+        assert isinstance(response, str)
+        assert "technical difficulties" not in response
@@ -3,12 +3,11 @@ Tests for ChatGraphBuilder functionality.
 """
 
 import pytest
-from unittest.mock import Mock
+from types import SimpleNamespace
 from langgraph.graph import StateGraph
 from langgraph.checkpoint.memory import MemorySaver
 
-from app.agents.graph.chat_graph import ChatGraphBuilder
-from app.agents.nodes.chat_nodes import ChatNodes
+from app.agents.graph.chat_graph import CHECKPOINT_DURABILITY, ChatGraphBuilder
 from app.agents.states.chat_state import ChatState
 
 
@@ -20,9 +19,9 @@ class TestChatGraphBuilder:
         builder = ChatGraphBuilder(chat_nodes)
         assert builder.chat_nodes == chat_nodes
         
-    def test_build_graph_returns_compiled_graph(self, graph_builder, memory_saver):
+    def test_build_graph_returns_compiled_graph(self, compiled_graph):
         """Test that build_graph returns a compiled graph."""
-        graph = graph_builder.build_graph(memory_saver)
+        graph = compiled_graph
         
         # Verify that a graph was returned
         assert graph is not None
@@ -38,48 +37,61 @@ class TestChatGraphBuilder:
         assert graph is not None
         assert hasattr(graph, 'ainvoke')
         
-    def test_build_graph_structure(self, graph_builder, memory_saver):
+    def test_build_graph_structure(self, compiled_graph):
         """Test that the built graph has correct structure."""
-        graph = graph_builder.build_graph(memory_saver)
+        graph = compiled_graph
         
         # The graph should be compiled and callable
         assert callable(graph.ainvoke)
         assert callable(graph.aget_state)
         
     @pytest.mark.asyncio
-    async def test_graph_execution_flow(self, graph_builder, memory_saver):
+    async def test_graph_execution_flow(self, compiled_graph, sid):
         """Test that the graph can execute the full flow."""
+        graph = compiled_graph
+        
+        initial_state = {
+            "messages": [{"type": "human", "content": "Hello"}],
+            "session_id": sid("test_graph_execution"),
+            "user_type": "customer",
+            "processed": False
+        }
+        
+        thread_config = {"configurable": {"thread_id": sid("test_thread")}}
+        
+        result = await graph.ainvoke(initial_state, thread_config)
+        
+        # Basic validation that we get a result
+        assert result is not None
+        assert "messages" in result
+
+
+    @pytest.mark.asyncio
+    async def test_graph_checkpoints_once_per_run(self, graph_builder, memory_saver, sid):
+        """Test that end-of-run durability writes a single checkpoint."""
         graph = graph_builder.build_graph(memory_saver)
         
         initial_state = {
             "messages": [{"type": "human", "content": "Hello"}],
-            "session_id": "test_graph_execution",
+            "session_id": sid("test_durability"),
             "user_type": "customer",
             "processed": False
         }
         
-        thread_config = {"configurable": {"thread_id": "test_thread"}}
-        
-        # This should not raise an exception
-        try:
-            result = await graph.ainvoke(initial_state, thread_config)
-            # Basic validation that we get a result
-            assert result is not None
-            assert "messages" in result
-        except Exception as e:
-            # If there's an exception, it should be handled gracefully
-            pytest.fail(f"Graph execution failed: {e}")
+        thread_config = {"configurable": {"thread_id": sid("durability_thread")}}
+        await graph.ainvoke(initial_state, thread_config, durability=CHECKPOINT_DURABILITY)
+        
+        checkpoints = [c async for c in memory_saver.alist(thread_config)]
+        assert len(checkpoints) == 1
+        assert checkpoints[0].checkpoint["channel_values"]["processed"] is True
 
 
 class TestGraphIntegration:
     """Integration tests for the complete graph workflow."""
     
     @pytest.mark.asyncio
-    async def test_graph_with_mock_nodes(self, memory_saver, mock_sessions):
+    async def test_graph_with_mock_nodes(self, memory_saver, mock_sessions, sid):
         """Test graph with completely mocked nodes."""
-        # Create mock chat nodes
-        mock_nodes = Mock(spec=ChatNodes)
-        
         # Mock the node methods
         async def mock_input_processing(state):
             state["processed_input"] = True
@@ -93,9 +105,12 @@ class TestGraphIntegration:
             state["processed"] = True
             return state
         
-        mock_nodes.input_processing_node = mock_input_processing
-        mock_nodes.llm_processing_node = mock_llm_processing
-        mock_nodes.response_formatting_node = mock_response_formatting
+        # Create mock chat nodes
+        mock_nodes = SimpleNamespace(
+            input_processing_node=mock_input_processing,
+            llm_processing_node=mock_llm_processing,
+            response_formatting_node=mock_response_formatting,
+        )
         
         # Build graph with mocked nodes
         builder = ChatGraphBuilder(mock_nodes)
@@ -103,12 +118,12 @@ class TestGraphIntegration:
         
         initial_state = {
             "messages": [],
-            "session_id": "mock_test",
+            "session_id": sid("mock_test"),
             "user_type": "customer",
             "processed": False
         }
         
-        thread_config = {"configurable": {"thread_id": "mock_thread"}}
+        thread_config = {"configurable": {"thread_id": sid("mock_thread")}}
         result = await graph.ainvoke(initial_state, thread_config)
         
         # Verify that all processing flags were set
@@ -119,10 +134,10 @@ class TestGraphIntegration:
         # ChatGraphBuilder may not immediately raise an error on init
         # but should fail when trying to build the graph
         builder = ChatGraphBuilder(None)
-        memory = MemorySaver()
         
-        with pytest.raises((TypeError, AttributeError)):
-            builder.build_graph(memory)
+        # Fails on the first node lookup, before the checkpointer is used
+        with pytest.raises(AttributeError):
+            builder.build_graph(None)
             
     def test_graph_builder_with_invalid_nodes(self):
         """Test that graph builder handles invalid nodes."""
@@ -130,45 +145,36 @@ class TestGraphIntegration:
         
         # This should either raise an error during init or during build
         builder = ChatGraphBuilder(invalid_nodes)
-        memory = MemorySaver()
         
-        with pytest.raises((TypeError, AttributeError)):
-            builder.build_graph(memory)
+        # Fails on the first node lookup, before the checkpointer is used
+        with pytest.raises(AttributeError):
+            builder.build_graph(None)
             
-    def test_memory_saver_integration(self, graph_builder):
+    def test_memory_saver_integration(self, graph_builder, memory_saver):
         """Test that memory saver is properly integrated."""
-        memory1 = MemorySaver()
-        memory2 = MemorySaver()
-        
-        graph1 = graph_builder.build_graph(memory1)
-        graph2 = graph_builder.build_graph(memory2)
+        graph = graph_builder.build_graph(memory_saver)
         
-        # Both graphs should be valid but potentially different instances
-        assert graph1 is not None
-        assert graph2 is not None
+        assert graph is not None
+        assert graph.checkpointer is memory_saver
         
     @pytest.mark.asyncio
-    async def test_graph_state_persistence(self, graph_builder, memory_saver):
+    async def test_graph_state_persistence(self, compiled_graph, sid):
         """Test that graph state is persisted correctly."""
-        graph = graph_builder.build_graph(memory_saver)
+        graph = compiled_graph
         
         initial_state = {
             "messages": [],
-            "session_id": "persistence_test",
+            "session_id": sid("persistence_test"),
             "user_type": "customer",
             "processed": False
         }
         
-        thread_config = {"configurable": {"thread_id": "persistence_thread"}}
+        thread_config = {"configurable": {"thread_id": sid("persistence_thread")}}
         
         # Execute the graph
         result = await graph.ainvoke(initial_state, thread_config)
         
-        # Try to get the state back
-        try:
-            state = await graph.aget_state(thread_config)
-            assert state is not None
-        except Exception:
-            # Some implementations might not support state retrieval
-            # This is acceptable for basic functionality
-            pass 
\ No newline at end of file
+        # The checkpointed state should match the run's final state
+        state = await graph.aget_state(thread_config)
+        assert state.values["session_id"] == initial_state["session_id"]
+        assert state.values["messages"] == result["messages"]
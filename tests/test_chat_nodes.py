@@ -2,15 +2,46 @@
 Tests for ChatNodes processing functionality.
 """
 
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, Mock
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from langgraph.graph.message import add_messages
 
 from app.agents.nodes.chat_nodes import ChatNodes
 from app.agents.states.chat_state import SessionInfo
 
 
+def apply_update(state, update):
+    """Merge a node's partial update into state the way LangGraph does."""
+    merged = dict(state)
+    for key, value in update.items():
+        if key == "messages":
+            merged[key] = add_messages(state["messages"], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class ErrorLLM:
+    """Fake LLM whose every call fails."""
+    
+    async def ainvoke(self, messages, config=None, **kwargs):
+        raise RuntimeError("API Error")
+
+
+class RecordingLLM:
+    """Fake LLM that records the messages of its last call."""
+    
+    def __init__(self):
+        self.messages = None
+        self.calls = 0
+    
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.messages = list(messages)
+        self.calls += 1
+        return AIMessage(content=f"reply {self.calls}")
+
+
 class TestChatNodes:
     """Test cases for ChatNodes class."""
     
@@ -37,33 +68,24 @@ class TestInputProcessingNode:
     """Test cases for input processing node."""
     
     @pytest.mark.asyncio
-    async def test_input_processing_adds_system_message(self, chat_nodes, sample_chat_state):
-        """Test that input processing adds system message for customer."""
-        sample_chat_state["user_type"] = "customer"
-        result = await chat_nodes.input_processing_node(sample_chat_state)
-        
-        # Check that system message was added
+    @pytest.mark.parametrize("user_type, expected", [
+        ("customer", "helpful AI assistant for customers"),
+        ("support_agent", "AI assistant for support agents"),
+        ("manager", "AI assistant for managers"),
+        # Unknown user types fall back to the customer prompt
+        ("unknown_type", "helpful AI assistant for customers"),
+    ])
+    async def test_input_processing_system_prompts(self, chat_nodes, sample_chat_state, user_type, expected):
+        """Test that input processing prepends the system prompt for each user type."""
+        state = {**sample_chat_state, "user_type": user_type}
+        
+        result = apply_update(state, await chat_nodes.input_processing_node(state))
+        
+        # Check that system message was added ahead of the user's message
         assert len(result["messages"]) == 2
         assert isinstance(result["messages"][0], SystemMessage)
-        assert "helpful AI assistant for customers" in result["messages"][0].content
-        
-    @pytest.mark.asyncio
-    async def test_input_processing_support_agent_prompt(self, chat_nodes, sample_chat_state):
-        """Test input processing with support agent user type."""
-        sample_chat_state["user_type"] = "support_agent"
-        result = await chat_nodes.input_processing_node(sample_chat_state)
-        
-        assert isinstance(result["messages"][0], SystemMessage)
-        assert "AI assistant for support agents" in result["messages"][0].content
-        
-    @pytest.mark.asyncio
-    async def test_input_processing_manager_prompt(self, chat_nodes, sample_chat_state):
-        """Test input processing with manager user type."""
-        sample_chat_state["user_type"] = "manager"
-        result = await chat_nodes.input_processing_node(sample_chat_state)
-        
-        assert isinstance(result["messages"][0], SystemMessage)
-        assert "AI assistant for managers" in result["messages"][0].content
+        assert expected in result["messages"][0].content
+        assert isinstance(result["messages"][1], HumanMessage)
         
     @pytest.mark.asyncio
     async def test_input_processing_preserves_existing_system_message(self, chat_nodes):
@@ -78,20 +100,10 @@ class TestInputProcessingNode:
             "processed": False
         }
         
-        result = await chat_nodes.input_processing_node(state)
+        update = await chat_nodes.input_processing_node(state)
         
         # Should not add another system message
-        assert len(result["messages"]) == 2
-        assert result["messages"][0].content == "Custom system message"
-        
-    @pytest.mark.asyncio
-    async def test_input_processing_unknown_user_type(self, chat_nodes, sample_chat_state):
-        """Test input processing with unknown user type defaults to customer."""
-        sample_chat_state["user_type"] = "unknown_type"
-        result = await chat_nodes.input_processing_node(sample_chat_state)
-        
-        assert isinstance(result["messages"][0], SystemMessage)
-        assert "helpful AI assistant for customers" in result["messages"][0].content
+        assert update == {}
 
 
 class TestLLMProcessingNode:
@@ -102,8 +114,8 @@ class TestLLMProcessingNode:
         """Test LLM processing with mocked LLM."""
         result = await chat_nodes.llm_processing_node(sample_chat_state)
         
-        # Should have original message plus AI response
-        assert len(result["messages"]) == 2
+        # Should return only the new AI response
+        assert len(result["messages"]) == 1
         assert isinstance(result["messages"][-1], AIMessage)
         assert result["messages"][-1].content == "Mock AI response"
         
@@ -112,8 +124,8 @@ class TestLLMProcessingNode:
         """Test LLM processing without LLM (fallback behavior)."""
         result = await chat_nodes_no_llm.llm_processing_node(sample_chat_state)
         
-        # Should have original message plus fallback response
-        assert len(result["messages"]) == 2
+        # Should return only the fallback response
+        assert len(result["messages"]) == 1
         assert isinstance(result["messages"][-1], AIMessage)
         assert "mock chatbot response" in result["messages"][-1].content
         assert "without OpenAI API key" in result["messages"][-1].content
@@ -129,11 +141,7 @@ class TestLLMProcessingNode:
     @pytest.mark.asyncio
     async def test_llm_processing_error_handling(self, mock_sessions):
         """Test LLM processing error handling."""
-        # Create a mock LLM that raises an exception
-        error_llm = Mock(spec=ChatOpenAI)
-        error_llm.ainvoke = AsyncMock(side_effect=Exception("API Error"))
-        
-        nodes = ChatNodes(llm=error_llm, sessions=mock_sessions)
+        nodes = ChatNodes(llm=ErrorLLM(), sessions=mock_sessions)
         
         state = {
             "messages": [HumanMessage(content="Test")],
@@ -145,9 +153,75 @@ class TestLLMProcessingNode:
         result = await nodes.llm_processing_node(state)
         
         # Should handle error gracefully
-        assert len(result["messages"]) == 2
+        assert len(result["messages"]) == 1
         assert isinstance(result["messages"][-1], AIMessage)
         assert "technical difficulties" in result["messages"][-1].content
+        
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("history_window,expected_count", [(None, 7), (2, 3), (10, 7)])
+    async def test_llm_processing_history_window(self, mock_sessions, history_window, expected_count):
+        """Test that only the system prompt and the most recent messages reach the LLM."""
+        llm = RecordingLLM()
+        nodes = ChatNodes(llm=llm, sessions=mock_sessions, history_window=history_window)
+        
+        history = [
+            HumanMessage(content="1"), AIMessage(content="2"),
+            HumanMessage(content="3"), AIMessage(content="4"),
+            HumanMessage(content="5"), AIMessage(content="6"),
+        ]
+        state = {
+            "messages": [SystemMessage(content="System"), *history],
+            "session_id": "window_test",
+            "user_type": "customer",
+            "processed": False
+        }
+        
+        await nodes.llm_processing_node(state)
+        
+        assert len(llm.messages) == expected_count
+        assert isinstance(llm.messages[0], SystemMessage)
+        assert llm.messages[-1] is history[-1]
+        
+    @pytest.mark.asyncio
+    async def test_llm_processing_response_cache(self, mock_sessions):
+        """Test that identical prompts are answered from the cache."""
+        llm = RecordingLLM()
+        nodes = ChatNodes(llm=llm, sessions=mock_sessions, response_cache_size=1)
+        
+        def state(content, user_type="customer"):
+            return {
+                "messages": [HumanMessage(content=content)],
+                "session_id": "cache_test",
+                "user_type": user_type,
+                "processed": False
+            }
+        
+        first = await nodes.llm_processing_node(state("Hello"))
+        repeat = await nodes.llm_processing_node(state("Hello"))
+        other_type = await nodes.llm_processing_node(state("Hello", "manager"))
+        
+        assert repeat["messages"][-1].content == first["messages"][-1].content == "reply 1"
+        assert repeat["messages"][-1] is not first["messages"][-1]
+        assert other_type["messages"][-1].content == "reply 2"
+        
+        # Size 1 evicted the customer entry
+        await nodes.llm_processing_node(state("Hello"))
+        assert llm.calls == 3
+        
+    @pytest.mark.asyncio
+    async def test_llm_processing_errors_are_not_cached(self, mock_sessions):
+        """Test that fallback responses for failed calls are never cached."""
+        nodes = ChatNodes(llm=ErrorLLM(), sessions=mock_sessions, response_cache_size=8)
+        state = {
+            "messages": [HumanMessage(content="Test")],
+            "session_id": "cache_error_test",
+            "user_type": "customer",
+            "processed": False
+        }
+        
+        await nodes.llm_processing_node(state)
+        
+        assert len(nodes._response_cache) == 0
 
 
 class TestResponseFormattingNode:
@@ -160,19 +234,20 @@ class TestResponseFormattingNode:
         
         result = await chat_nodes.response_formatting_node(sample_chat_state)
         
-        assert result["processed"] is True
+        assert result == {"processed": True}
         
     @pytest.mark.asyncio
     async def test_response_formatting_creates_new_session(self, chat_nodes, sample_chat_state):
         """Test response formatting creates new session info."""
         session_id = sample_chat_state["session_id"]
-        assert session_id not in chat_nodes.sessions
+        assert chat_nodes.sessions.get(session_id) is None
         
         await chat_nodes.response_formatting_node(sample_chat_state)
         
-        assert session_id in chat_nodes.sessions
-        assert chat_nodes.sessions[session_id].message_count == 1
-        assert chat_nodes.sessions[session_id].user_type == sample_chat_state["user_type"]
+        session = chat_nodes.sessions.get(session_id)
+        assert session is not None
+        assert session.message_count == 1
+        assert session.user_type == sample_chat_state["user_type"]
         
     @pytest.mark.asyncio
     async def test_response_formatting_updates_existing_session(self, chat_nodes, sample_chat_state):
@@ -195,19 +270,20 @@ class TestResponseFormattingNode:
     async def test_response_formatting_different_user_types(self, chat_nodes):
         """Test response formatting with different user types."""
         user_types = ["customer", "support_agent", "manager"]
-        
-        for i, user_type in enumerate(user_types):
-            state = {
+        states = [
+            {
                 "messages": [HumanMessage(content="Test")],
                 "session_id": f"test_session_{i}",
                 "user_type": user_type,
                 "processed": False
             }
-            
-            await chat_nodes.response_formatting_node(state)
-            
-            session_id = state["session_id"]
-            assert chat_nodes.sessions[session_id].user_type == user_type
+            for i, user_type in enumerate(user_types)
+        ]
+        
+        await asyncio.gather(*(chat_nodes.response_formatting_node(state) for state in states))
+        
+        for state in states:
+            assert chat_nodes.sessions[state["session_id"]].user_type == state["user_type"]
 
 
 class TestChatNodesIntegration:
@@ -224,9 +300,15 @@ class TestChatNodesIntegration:
         }
         
         # Process through all nodes
-        state_after_input = await chat_nodes.input_processing_node(initial_state)
-        state_after_llm = await chat_nodes.llm_processing_node(state_after_input)
-        final_state = await chat_nodes.response_formatting_node(state_after_llm)
+        state_after_input = apply_update(
+            initial_state, await chat_nodes.input_processing_node(initial_state)
+        )
+        state_after_llm = apply_update(
+            state_after_input, await chat_nodes.llm_processing_node(state_after_input)
+        )
+        final_state = apply_update(
+            state_after_llm, await chat_nodes.response_formatting_node(state_after_llm)
+        )
         
         # Verify final state
         assert final_state["processed"] is True
@@ -237,5 +319,6 @@ class TestChatNodesIntegration:
         
         # Verify session was created
         session_id = final_state["session_id"]
-        assert session_id in chat_nodes.sessions
-        assert chat_nodes.sessions[session_id].message_count == 1 
\ No newline at end of file
+        session = chat_nodes.sessions.get(session_id)
+        assert session is not None
+        assert session.message_count == 1 
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Tests for the chat API routes.
+"""
+
+import orjson
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app.agents.chat_agent import ChatAgent
+from app.main import app
+
+
+def read_events(response):
+    """Decode the data of each Server-Sent Event in ``response``."""
+    frames = response.text.split("\n\n")
+    assert frames[-1] == ""
+    
+    events = []
+    for frame in frames[:-1]:
+        assert frame.startswith("data: ")
+        events.append(orjson.loads(frame[len("data: "):]))
+    return events
+
+
+class TestChatStreamRoute:
+    """Test cases for POST /chat/stream."""
+    
+    def test_stream_sends_llm_chunks_as_events(self, api_client, sid):
+        """Test that each LLM chunk is sent as its own JSON-encoded SSE frame."""
+        session_id = sid("stream_route")
+        
+        response = api_client.post(
+            "/api/v1/chat/stream", json={"message": "Hello", "session_id": session_id}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-session-id"] == session_id
+        
+        events = read_events(response)
+        # Only the LLM node's chunks are sent, never the user's own message
+        assert len(events) > 1
+        assert "".join(events) == "Streamed test response"
+        
+    def test_stream_creates_session_id(self, api_client):
+        """Test that a session ID is generated and returned when none is sent."""
+        response = api_client.post("/api/v1/chat/stream", json={"message": "Hello"})
+        
+        session_id = response.headers["x-session-id"]
+        assert session_id
+        
+        history = api_client.get(f"/api/v1/chat/sessions/{session_id}/history").json()
+        assert [msg["type"] for msg in history["history"]] == ["human", "ai"]
+        assert history["history"][1]["content"] == "Streamed test response"
+
+
+class TestChatBatchRoute:
+    """Test cases for POST /chat/batch."""
+    
+    def test_batch_answers_every_request(self, api_client, sid):
+        """Test that each request gets a response in its own session."""
+        response = api_client.post("/api/v1/chat/batch", json=[
+            {"message": "Hello"},
+            {"message": "Hi", "session_id": sid("batch_route"), "user_type": "manager"},
+        ])
+        
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["response"] for r in results] == ["Streamed test response"] * 2
+        assert [r["user_type"] for r in results] == ["customer", "manager"]
+        assert results[0]["session_id"] != results[1]["session_id"]
+        assert all(r["is_new_session"] for r in results)
+        
+    def test_batch_repeated_new_session(self, api_client, sid):
+        """Test that a new session repeated in one batch is only new the first time."""
+        session_id = sid("batch_route")
+        
+        response = api_client.post("/api/v1/chat/batch", json=[
+            {"message": "First", "session_id": session_id},
+            {"message": "Second", "session_id": session_id},
+        ])
+        
+        assert [r["is_new_session"] for r in response.json()] == [True, False]
+        
+        history = api_client.get(f"/api/v1/chat/sessions/{session_id}/history").json()
+        assert [msg["content"] for msg in history["history"] if msg["type"] == "human"] == ["First", "Second"]
+        
+    def test_batch_existing_session(self, api_client, sid):
+        """Test that a session from an earlier request is not reported as new."""
+        session_id = sid("batch_route")
+        api_client.post("/api/v1/chat/", json={"message": "Hello", "session_id": session_id})
+        
+        response = api_client.post("/api/v1/chat/batch", json=[
+            {"message": "Again", "session_id": session_id},
+        ])
+        
+        assert response.json()[0]["is_new_session"] is False
+
+
+class TestAppLifespan:
+    """Test cases for the application lifespan and error handling."""
+    
+    def test_lifespan_creates_and_shuts_down_agent(self, monkeypatch):
+        """Test that the agent is initialized on startup and shut down on exit."""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.delenv("REDIS_URL", raising=False)
+        
+        with patch.object(ChatAgent, "shutdown", autospec=True) as shutdown:
+            with TestClient(app) as client:
+                agent = client.app.state.chat_agent
+                
+                assert agent.graph is not None
+                assert client.get("/api/v1/chat/health").json()["agent_initialized"] is True
+                shutdown.assert_not_awaited()
+                
+            shutdown.assert_awaited_once_with(agent)
+        
+    @pytest.mark.parametrize("pool_size, expected_workers", [
+        ("8", 8),
+        ("many", 128),
+        ("0", 128),
+    ])
+    def test_lifespan_thread_pool(self, monkeypatch, pool_size, expected_workers):
+        """Test that the default executor is sized from THREAD_POOL_SIZE and shut down on exit."""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.delenv("REDIS_URL", raising=False)
+        monkeypatch.setenv("THREAD_POOL_SIZE", pool_size)
+        executors = []
+        
+        class RecordingExecutor(ThreadPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                executors.append(self)
+        
+        monkeypatch.setattr("app.main.ThreadPoolExecutor", RecordingExecutor)
+        
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+        
+        assert len(executors) == 1
+        assert executors[0]._max_workers == expected_workers
+        assert executors[0]._shutdown
+        
+    def test_unhandled_error_returns_generic_500(self, api_client, monkeypatch):
+        """Test that an agent error reaches the app handler and leaks no details."""
+        agent = api_client.app.state.chat_agent
+        monkeypatch.setattr(agent, "chat", AsyncMock(side_effect=RuntimeError("secret internals")))
+        
+        response = api_client.post("/api/v1/chat/", json={"message": "Hello"})
+        
+        assert response.status_code == 500
+        assert response.json() == {"detail": "Internal server error"}
+        assert "secret internals" not in response.text
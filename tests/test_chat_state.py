@@ -5,7 +5,7 @@ Tests for chat state classes and functionality.
 import pytest
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
-from app.agents.states.chat_state import ChatState, SessionInfo
+from app.agents.states.chat_state import ChatState, SessionInfo, SessionStore
 
 
 class TestSessionInfo:
@@ -50,6 +50,58 @@ class TestSessionInfo:
         assert session.user_type == "support_agent"
 
 
+    def test_session_info_has_no_instance_dict(self):
+        """Test SessionInfo uses slots instead of a per-instance __dict__."""
+        session = SessionInfo(session_id="test")
+        assert not hasattr(session, "__dict__")
+
+
+class TestSessionStore:
+    """Test cases for the bounded SessionStore."""
+    
+    def test_session_store_behaves_like_dict(self):
+        """Test basic mapping behavior."""
+        store = SessionStore()
+        assert store == {}
+        
+        store["a"] = SessionInfo(session_id="a")
+        assert "a" in store
+        assert store["a"].session_id == "a"
+        assert store.get("missing") is None
+        
+    def test_session_store_evicts_oldest(self):
+        """Test that the least recently used session is evicted when full."""
+        store = SessionStore(max_sessions=2)
+        store["a"] = SessionInfo(session_id="a")
+        store["b"] = SessionInfo(session_id="b")
+        store["c"] = SessionInfo(session_id="c")
+        
+        assert list(store) == ["b", "c"]
+        
+    def test_session_store_access_refreshes_recency(self):
+        """Test that reading a session protects it from eviction."""
+        store = SessionStore(max_sessions=2)
+        store["a"] = SessionInfo(session_id="a")
+        store["b"] = SessionInfo(session_id="b")
+        
+        store["a"].message_count += 1
+        store["c"] = SessionInfo(session_id="c")
+        
+        assert list(store) == ["a", "c"]
+        assert store["a"].message_count == 1
+        
+    def test_session_store_get_refreshes_recency(self):
+        """Test that get() refreshes recency like indexing does."""
+        store = SessionStore(max_sessions=2)
+        store["a"] = SessionInfo(session_id="a")
+        store["b"] = SessionInfo(session_id="b")
+        
+        store.get("a")
+        store["c"] = SessionInfo(session_id="c")
+        
+        assert list(store) == ["a", "c"]
+
+
 class TestChatState:
     """Test cases for ChatState TypedDict functionality."""
     
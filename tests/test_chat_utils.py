@@ -3,7 +3,9 @@ Tests for chat utility functions.
 """
 
 import pytest
-from app.agents.utils.chat_utils import get_system_prompt
+from langchain_core.messages import SystemMessage
+
+from app.agents.utils.chat_utils import get_system_message, get_system_prompt
 
 
 class TestChatUtils:
@@ -62,4 +64,16 @@ class TestChatUtils:
         
         assert customer_prompt != support_prompt
         assert customer_prompt != manager_prompt
-        assert support_prompt != manager_prompt 
\ No newline at end of file
+        assert support_prompt != manager_prompt
+        
+    def test_get_system_message_matches_prompt(self):
+        """Test that prebuilt system messages carry the user type's prompt."""
+        for user_type in ["customer", "support_agent", "manager"]:
+            message = get_system_message(user_type)
+            assert isinstance(message, SystemMessage)
+            assert message.content == get_system_prompt(user_type)
+            
+    def test_get_system_message_is_reused(self):
+        """Test that the same message instance is returned on every call."""
+        assert get_system_message("manager") is get_system_message("manager")
+        assert get_system_message("unknown_type") is get_system_message("customer")
@@ -0,0 +1,190 @@
+"""
+Tests for application settings.
+"""
+
+import importlib
+
+import pytest
+from pydantic import ValidationError
+from pydantic_settings import SettingsError
+
+REQUIRED_ENV = {
+    "LLM_OPENAI_API_KEY": "test_api_key",
+    "SECRET_KEY": "s" * 32,
+}
+
+
+@pytest.fixture
+def settings_module(monkeypatch, tmp_path):
+    """Import ``config.settings`` with the required variables set and no ``.env``."""
+    monkeypatch.chdir(tmp_path)
+    for key, value in REQUIRED_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.delenv("FAST_SETTINGS", raising=False)
+    
+    module = importlib.import_module("config.settings")
+    module.get_settings.cache_clear()
+    
+    yield module
+    
+    module.get_settings.cache_clear()
+
+
+class TestSettingsValidation:
+    """Test cases for Settings field validation."""
+    
+    @pytest.mark.parametrize("key, value", [
+        ("ENVIRONMENT", "prod"),
+        ("LOG_LEVEL", "verbose"),
+        ("VECTOR_DB_PROVIDER", "milvus"),
+    ])
+    def test_rejects_unknown_literal_values(self, settings_module, monkeypatch, key, value):
+        """Test that values outside a Literal field's choices are rejected."""
+        monkeypatch.setenv(key, value)
+        
+        with pytest.raises(ValidationError):
+            settings_module.Settings()
+        
+    def test_log_level_is_normalized(self, settings_module, monkeypatch):
+        """Test that log_level accepts any case and is stored upper-case."""
+        monkeypatch.setenv("LOG_LEVEL", "debug")
+        
+        assert settings_module.Settings().log_level == "DEBUG"
+        
+    def test_vector_db_provider_env_name(self, settings_module, monkeypatch):
+        """Test that the provider is read from VECTOR_DB_PROVIDER, not PROVIDER."""
+        monkeypatch.setenv("PROVIDER", "weaviate")
+        assert settings_module.Settings().vector_db.provider == "pinecone"
+        
+        monkeypatch.setenv("VECTOR_DB_PROVIDER", "chroma")
+        assert settings_module.Settings().vector_db.provider == "chroma"
+        
+    def test_placeholder_secrets_are_rejected(self, settings_module, monkeypatch):
+        """Test that the env.example placeholders don't pass validation."""
+        monkeypatch.setenv("LLM_OPENAI_API_KEY", "your_openai_api_key_here")
+        
+        with pytest.raises(ValidationError):
+            settings_module.Settings()
+
+
+class TestSettingsViews:
+    """Test cases for the grouped and derived settings views."""
+    
+    def test_grouped_views(self, settings_module, monkeypatch):
+        """Test that grouped views expose the flat fields under their old names."""
+        monkeypatch.setenv("LLM_MODEL", "gpt-4o")
+        monkeypatch.setenv("CACHE_TTL", "60")
+        
+        settings = settings_module.Settings()
+        
+        assert settings.llm.model == "gpt-4o"
+        assert settings.llm.openai_api_key == "test_api_key"
+        assert settings.cache.ttl == 60
+        
+    @pytest.mark.parametrize("name", ["db_config", "cors_config"])
+    def test_config_mappings_are_read_only(self, settings_module, name):
+        """Test that the cached config mappings can't be modified by callers."""
+        settings = settings_module.Settings()
+        config = getattr(settings, name)
+        
+        with pytest.raises(TypeError):
+            config["injected"] = True
+        
+        assert "injected" not in getattr(settings, name)
+        
+    def test_db_config_values(self, settings_module, monkeypatch):
+        """Test that db_config reflects the database and debug settings."""
+        monkeypatch.setenv("DATABASE_URL", "postgresql://db/chatbot")
+        monkeypatch.setenv("DEBUG", "false")
+        
+        config = settings_module.Settings().get_db_config()
+        
+        assert config["url"] == "postgresql://db/chatbot"
+        assert config["echo"] is False
+
+
+class TestGetSettings:
+    """Test cases for get_settings and rebuild_settings."""
+    
+    def test_get_settings_is_cached(self, settings_module):
+        """Test that get_settings returns the same instance until cleared."""
+        assert settings_module.get_settings() is settings_module.get_settings()
+        
+    def test_rebuild_settings_reads_environment(self, settings_module, monkeypatch):
+        """Test that rebuild_settings picks up environment changes."""
+        monkeypatch.setattr(settings_module, "settings", settings_module.get_settings())
+        monkeypatch.setenv("APP_NAME", "Rebuilt")
+        
+        rebuilt = settings_module.rebuild_settings()
+        
+        assert rebuilt.app_name == "Rebuilt"
+        assert settings_module.settings is rebuilt
+        assert settings_module.get_settings() is rebuilt
+        
+    def test_reads_env_file(self, settings_module, tmp_path):
+        """Test that values in .env are used and the environment overrides them."""
+        (tmp_path / ".env").write_text(
+            'APP_NAME=From dotenv\nLOG_LEVEL=debug\nCORS_ORIGINS=["https://example.com"]\n'
+        )
+        settings_module.rebuild_settings()
+        
+        settings = settings_module.Settings()
+        
+        assert settings.app_name == "From dotenv"
+        assert settings.log_level == "DEBUG"
+        assert settings.cors_origins == ["https://example.com"]
+        assert settings.llm.openai_api_key == "test_api_key"
+        
+    def test_rebuild_settings_reads_env_file_changes(self, settings_module, monkeypatch, tmp_path):
+        """Test that .env is parsed once until rebuild_settings is called."""
+        monkeypatch.setattr(settings_module, "settings", settings_module.get_settings())
+        env_file = tmp_path / ".env"
+        env_file.write_text("APP_NAME=First\n")
+        settings_module.rebuild_settings()
+        
+        env_file.write_text("APP_NAME=Second\n")
+        assert settings_module.Settings().app_name == "First"
+        
+        assert settings_module.rebuild_settings().app_name == "Second"
+
+
+class TestFastSettings:
+    """Test cases for the FAST_SETTINGS construction path."""
+    
+    def test_matches_default_path(self, settings_module, monkeypatch):
+        """Test that the fast path builds the same settings as the default one."""
+        monkeypatch.setenv("LOG_LEVEL", "warning")
+        monkeypatch.setenv("PORT", "9000")
+        monkeypatch.setenv("DEBUG", "false")
+        monkeypatch.setenv("CORS_ORIGINS", '["https://example.com"]')
+        monkeypatch.setenv("VECTOR_DB_PROVIDER", "chroma")
+        
+        default = settings_module.Settings()
+        fast = settings_module._build_fast_settings()
+        
+        assert fast.model_dump() == default.model_dump()
+        assert fast.cors_config == default.cors_config
+        
+    def test_get_settings_uses_fast_path(self, settings_module, monkeypatch):
+        """Test that FAST_SETTINGS=1 selects the fast path."""
+        monkeypatch.setenv("FAST_SETTINGS", "1")
+        
+        assert isinstance(settings_module.get_settings(), settings_module._FastSettings)
+        
+    @pytest.mark.parametrize("fast", [False, True])
+    def test_invalid_json_list(self, settings_module, monkeypatch, fast):
+        """Test that both paths reject a non-JSON list variable the same way."""
+        monkeypatch.setenv("CORS_ORIGINS", "https://example.com")
+        build = settings_module._build_fast_settings if fast else settings_module.Settings
+        
+        with pytest.raises(SettingsError, match="cors_origins"):
+            build()
+            
+    @pytest.mark.parametrize("fast", [False, True])
+    def test_invalid_literal(self, settings_module, monkeypatch, fast):
+        """Test that both paths run field validation."""
+        monkeypatch.setenv("ENVIRONMENT", "qa")
+        build = settings_module._build_fast_settings if fast else settings_module.Settings
+        
+        with pytest.raises(ValidationError):
+            build()